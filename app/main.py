@@ -1,17 +1,26 @@
 import streamlit as st
-from utils.state import initialize_session_state
-from views.main_view import display_main_view
-from views.logs_view import display_logs_view
-from views.scale_view import display_scale_view
-from views.status_view import display_status_view
+from app.services.k8s_service import start_health_sampler
+from app.utils.state import initialize_session_state
+from app.utils.tracing import span
+from app.views.main_view import display_main_view
+from app.views.logs_view import display_logs_view
+from app.views.scale_view import display_scale_view
+from app.views.status_view import display_status_view
+from app.views.batch_view import display_batch_view
+from app.views.diagnostics_view import display_diagnostics
 
 initialize_session_state()
+start_health_sampler()
+display_diagnostics()
 
-if st.session_state.current_view == "main":
-    display_main_view()
-elif st.session_state.current_view == "logs_view":
-    display_logs_view()
-elif st.session_state.current_view == "scale_view":
-    display_scale_view()
-elif st.session_state.current_view == "status_view":
-    display_status_view()
+with span(f"view.{st.session_state.current_view}"):
+    if st.session_state.current_view == "main":
+        display_main_view()
+    elif st.session_state.current_view == "logs_view":
+        display_logs_view()
+    elif st.session_state.current_view == "scale_view":
+        display_scale_view()
+    elif st.session_state.current_view == "status_view":
+        display_status_view()
+    elif st.session_state.current_view == "batch_view":
+        display_batch_view()
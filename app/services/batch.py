@@ -0,0 +1,114 @@
+import functools
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import create_model
+from app.services import intent_classifier
+from app.services.gemini_calls import record_cache_hit
+from app.services.intent_cache import get_intent_cache
+from app.services.intent_schema import request_intent
+from app.utils.tracing import in_context, span
+
+# runbook sweeps: many prompts classified in one Gemini call, then the
+# Kubernetes work of every item run side by side
+BATCH_MAX_PROMPTS = int(os.getenv("BATCH_MAX_PROMPTS", 50))
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", 8))
+
+
+def parse_prompts(text: str, limit=BATCH_MAX_PROMPTS):
+    # one prompt per line, blank lines and # comments are skipped
+    prompts = [line.strip() for line in text.splitlines()]
+    return [p for p in prompts if p and not p.startswith("#")][:limit]
+
+
+@functools.lru_cache(maxsize=16)
+def _batch_schema(schema):
+    item = create_model("BatchIntent", __base__=schema, index=(int, ...))
+    return create_model("IntentBatch", intents=(list[item], ...))
+
+
+def classify(gclient, model: str, prompts, schema, actions, podnames):
+    # intents in prompt order, None where the model gave none; the local
+    # classifier and the intent cache answer what they can first
+    cache = get_intent_cache()
+    keys = [cache.key(prompt, podnames, model, actions) for prompt in prompts]
+    intents = []
+    for prompt, key in zip(prompts, keys):
+        intent = intent_classifier.fast_intent(prompt, podnames)
+        if intent is None:
+            intent = cache.get(key)
+            if intent is not None:
+                record_cache_hit("intent", model)
+        intents.append(intent)
+
+    pending = [i for i, intent in enumerate(intents) if intent is None]
+    if not pending:
+        return intents
+    requests = "\n".join(f"    {i + 1}. {prompts[i]}" for i in pending)
+    contents = f"""
+    Convert each numbered user request below into JSON with fields:
+    - index: the number of the request
+    - action: one of [{', '.join(actions)}]
+    - service: the pod/deployment name, one of {list(podnames)}
+    - namespace: default unless specified
+    - replicas: integer if scaling, else null
+    - scales: if several deployments are scaled, a list of objects with service and replicas, else null
+
+    Requests:
+{requests}
+    Respond with only valid JSON: an object whose "intents" list has one entry per request.
+    """
+    answer, _ = request_intent(gclient, model, contents, _batch_schema(schema), label="intent_batch")
+    for item in (answer or {}).get("intents", []):
+        i = item.pop("index") - 1
+        if i in pending and intents[i] is None:
+            intents[i] = item
+            cache.put(keys[i], item)
+    return intents
+
+
+def _work(number: int, prompt: str, intent, handlers):
+    start = time.perf_counter()
+    intent = intent or {}
+    action, service = intent.get("action"), intent.get("service")
+    handler = handlers.get(action)
+    if not intent:
+        status, result = "unclassified", "Could not classify this prompt."
+    elif handler is None:
+        status, result = "skipped", f"'{action}' is not run from a batch."
+    elif not service:
+        status, result = "skipped", "The prompt names no service."
+    else:
+        try:
+            status, result = "ok", handler(intent)
+        except Exception as e:
+            status, result = "error", str(e)
+    return {"#": number, "prompt": prompt, "action": action, "service": service, "status": status,
+            "ms": round((time.perf_counter() - start) * 1000, 1), "result": result}
+
+
+def run(prompts, intents, handlers, max_workers=BATCH_WORKERS):
+    # handlers: action -> fn(intent) returning text; they run on pool threads,
+    # so anything they need from the session is bound before the call
+    items = [(i + 1, prompt, intent) for i, (prompt, intent) in enumerate(zip(prompts, intents))]
+    with span("batch.run", prompts=len(items)):
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as pool:
+            return list(pool.map(in_context(lambda item: _work(*item, handlers)), items))
+
+
+def status_text(status: dict):
+    return ", ".join(f"{key}: {value}" for key, value in status.items())
+
+
+def summary(rows):
+    return dict(Counter(row["status"] for row in rows))
+
+
+def report_markdown(rows):
+    lines = ["# Batch report", "", "| # | Prompt | Action | Service | Status | ms |", "|---|---|---|---|---|---|"]
+    lines += [f"| {r['#']} | {r['prompt']} | {r['action'] or '-'} | {r['service'] or '-'} | {r['status']} | {r['ms']} |"
+              for r in rows]
+    for r in rows:
+        lines += ["", f"## {r['#']}. {r['prompt']}", "", "```", str(r["result"]).strip(), "```"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,7 @@
+# the microservices-demo deployments the assistant knows about, shared by the
+# Gemini prompts and the Kubernetes side
+PODNAMES = [
+    "recommendationservice","emailservice","productcatalogservice",
+    "adservice","shippingservice","frontend",
+    "cartservice","currencyservice","paymentservice","checkoutservice"
+]
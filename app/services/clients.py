@@ -0,0 +1,43 @@
+import os
+import time
+import yaml
+import streamlit as st
+from google import genai
+from kubernetes import client, config
+from app.services.fake_gemini import FakeGeminiClient
+
+# "gemini" for the real API, "fake" for the in-process stand-in
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "gemini")
+
+# built once per process and shared by every session and rerun
+init_timings = {}
+
+
+@st.cache_resource(show_spinner=False)
+def kube_clients(kubeconfig: str, context=None):
+    start = time.perf_counter()
+    # loaded from the secret in memory, no kubeconfig file on disk
+    api_client = config.new_client_from_config_dict(yaml.safe_load(kubeconfig), context=context)
+    clients = client.CoreV1Api(api_client), client.AppsV1Api(api_client)
+    init_timings[f"kube_clients[{context or 'current'}]_ms"] = (time.perf_counter() - start) * 1000
+    return clients
+
+
+def kube_contexts(kubeconfig: str):
+    # context names in the kubeconfig and the current one
+    kubeconfig = yaml.safe_load(kubeconfig)
+    return [c["name"] for c in kubeconfig.get("contexts", [])], kubeconfig.get("current-context")
+
+
+def new_gemini_client(api_key: str, backend=MODEL_BACKEND):
+    if backend == "fake":
+        return FakeGeminiClient()
+    return genai.Client(api_key=api_key)
+
+
+@st.cache_resource(show_spinner=False)
+def gemini_client(api_key: str):
+    start = time.perf_counter()
+    gclient = new_gemini_client(api_key)
+    init_timings["gemini_client_ms"] = (time.perf_counter() - start) * 1000
+    return gclient
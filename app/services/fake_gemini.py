@@ -0,0 +1,149 @@
+import ast
+import json
+import os
+import random
+import re
+import threading
+import time
+from google.genai import errors, types
+from app.services import intent_classifier
+from app.utils.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+# in-process stand-in for genai.Client (MODEL_BACKEND=fake), for load tests and
+# profiling without network access
+FAKE_GEMINI_LATENCY_MS = float(os.getenv("FAKE_GEMINI_LATENCY_MS", 400))
+# spread of the lognormal latency around the median, 0 is a fixed latency
+FAKE_GEMINI_LATENCY_SIGMA = float(os.getenv("FAKE_GEMINI_LATENCY_SIGMA", 0.5))
+FAKE_GEMINI_TOKENS_PER_SECOND = float(os.getenv("FAKE_GEMINI_TOKENS_PER_SECOND", 200))
+FAKE_GEMINI_OUTPUT_TOKENS = int(os.getenv("FAKE_GEMINI_OUTPUT_TOKENS", 300))
+FAKE_GEMINI_ERROR_RATE = float(os.getenv("FAKE_GEMINI_ERROR_RATE", 0))
+# share of JSON answers that come back with prose around them when no response
+# schema constrains the output
+FAKE_GEMINI_MALFORMED_RATE = float(os.getenv("FAKE_GEMINI_MALFORMED_RATE", 0))
+STREAM_CHUNK_TOKENS = 20
+
+SERVICES_IN_PROMPT = re.compile(r"one of (\[[^\]]*'[^\]]*\])")
+REQUEST_IN_PROMPT = re.compile(r"Request:\s*(.*)")
+NUMBERED_REQUESTS = re.compile(r"^\s*(\d+)\. (.*)$", re.MULTILINE)
+ANSWER_WORDS = ("the", "logs", "show", "requests", "to", "service", "are", "mostly", "healthy", "with", "a",
+                "few", "errors", "retries", "and", "latency", "spikes", "around", "restart", "pod")
+
+
+def _text(contents):
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, list):
+        return "\n".join(_text(c) for c in contents)
+    parts = getattr(contents, "parts", None)
+    if parts:
+        return "\n".join(p.text or "" for p in parts)
+    return str(contents)
+
+
+def _config(config, name: str):
+    if isinstance(config, dict):
+        return config.get(name)
+    return getattr(config, name, None)
+
+
+def _response(text: str, prompt_tokens: int, output_tokens: int):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]),
+                                    finish_reason=types.FinishReason.STOP)],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens, candidates_token_count=output_tokens,
+            total_token_count=prompt_tokens + output_tokens,
+        ),
+    )
+
+
+class FakeModels:
+    def __init__(self, latency_ms=FAKE_GEMINI_LATENCY_MS, latency_sigma=FAKE_GEMINI_LATENCY_SIGMA,
+                 tokens_per_second=FAKE_GEMINI_TOKENS_PER_SECOND, output_tokens=FAKE_GEMINI_OUTPUT_TOKENS,
+                 error_rate=FAKE_GEMINI_ERROR_RATE, malformed_rate=FAKE_GEMINI_MALFORMED_RATE, seed=None):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _sample(self):
+        with self._lock:
+            self.calls += 1
+            failed = self._random.random() < self.error_rate
+            code = self._random.choice((429, 503))
+            latency = self.latency_ms * self._random.lognormvariate(0, self.latency_sigma)
+        return failed, code, latency / 1000
+
+    def _fail(self, code: int):
+        status = "RESOURCE_EXHAUSTED" if code == 429 else "UNAVAILABLE"
+        body = {"error": {"code": code, "message": "fake backend error", "status": status}}
+        raise errors.ClientError(code, body) if code < 500 else errors.ServerError(code, body)
+
+    def _intent(self, request: str, services: str):
+        intent, _ = intent_classifier.classify(request, ast.literal_eval(services))
+        return intent or {"action": "irrelevant", "service": None, "namespace": "default", "replicas": None}
+
+    def _answer(self, prompt: str, config):
+        # intents are templated from the request through the local classifier,
+        # everything else gets filler text of the configured length
+        services = SERVICES_IN_PROMPT.search(prompt)
+        request = REQUEST_IN_PROMPT.search(prompt)
+        if services and "Requests:" in prompt:
+            batch = [{"index": int(number), **self._intent(text, services.group(1))}
+                     for number, text in NUMBERED_REQUESTS.findall(prompt.split("Requests:", 1)[1])]
+            return json.dumps({"intents": batch})
+        if services and request:
+            intent = self._intent(request.group(1), services.group(1))
+            with self._lock:
+                malformed = self._random.random() < self.malformed_rate
+            if malformed and _config(config, "response_schema") is None:
+                return f"Here is the JSON for the request:\n{json.dumps(intent)}"
+            return json.dumps(intent)
+        limit = _config(config, "max_output_tokens")
+        tokens = min(self.output_tokens, limit or self.output_tokens)
+        words, chars = [], 0
+        while chars < tokens * CHARS_PER_TOKEN:
+            words.append(self._random.choice(ANSWER_WORDS))
+            chars += len(words[-1]) + 1
+        return " ".join(words) + "."
+
+    def generate_content(self, model: str, contents, config=None):
+        failed, code, latency = self._sample()
+        prompt = _text(contents)
+        text = self._answer(prompt, config)
+        output_tokens = estimate_tokens(text)
+        time.sleep(latency + output_tokens / self.tokens_per_second)
+        if failed:
+            self._fail(code)
+        return _response(text, estimate_tokens(prompt), output_tokens)
+
+    def generate_content_stream(self, model: str, contents, config=None):
+        failed, code, latency = self._sample()
+        prompt = _text(contents)
+        text = self._answer(prompt, config)
+        time.sleep(latency)
+        if failed:
+            self._fail(code)
+        words = text.split(" ")
+        for i in range(0, len(words), STREAM_CHUNK_TOKENS):
+            more = i + STREAM_CHUNK_TOKENS < len(words)
+            chunk = " ".join(words[i:i + STREAM_CHUNK_TOKENS]) + (" " if more else "")
+            time.sleep(estimate_tokens(chunk) / self.tokens_per_second)
+            response = _response(chunk, estimate_tokens(prompt), estimate_tokens(text))
+            # like the real stream, the usage totals come with the last chunk
+            if more:
+                response.usage_metadata = None
+            yield response
+
+    def count_tokens(self, model: str, contents, config=None):
+        return types.CountTokensResponse(total_tokens=estimate_tokens(_text(contents)))
+
+
+class FakeGeminiClient:
+    def __init__(self, **kwargs):
+        self.models = FakeModels(**kwargs)
@@ -0,0 +1,224 @@
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from google.genai import errors
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+from app.services.gemini_scheduler import SchedulerBusy, get_scheduler, priority_of
+from app.utils.tokens import estimate_tokens
+from app.utils.tracing import span
+
+GEMINI_RETRIES = int(os.getenv("GEMINI_RETRIES", 2))
+# upper bound of the jittered exponential backoff between retries
+GEMINI_BACKOFF_MAX = float(os.getenv("GEMINI_BACKOFF_MAX", 30))
+GEMINI_CALL_HISTORY = int(os.getenv("GEMINI_CALL_HISTORY", 1000))
+RETRY_CODES = (429, 500, 502, 503, 504)
+# what a Gemini call raises once the scheduler turned it away or its retries
+# ran out, views catch these and ask the user to try again
+GEMINI_ERRORS = (SchedulerBusy, errors.APIError)
+
+_calls = deque(maxlen=GEMINI_CALL_HISTORY)
+_calls_lock = threading.Lock()
+
+
+def _usage(usage):
+    if usage is None:
+        return {"prompt_tokens": None, "output_tokens": None, "thought_tokens": None}
+    return {
+        "prompt_tokens": usage.prompt_token_count,
+        "output_tokens": usage.candidates_token_count,
+        "thought_tokens": usage.thoughts_token_count,
+    }
+
+
+def _record(label: str, model: str, latency_ms: float, usage=None, retries=0, cache_hit=False, error=None,
+            ttft_ms=None, queue_ms=0.0):
+    with _calls_lock:
+        _calls.append({
+            "time": time.time(),
+            "call": label,
+            "model": model,
+            **_usage(usage),
+            "latency_ms": round(latency_ms, 1),
+            "ttft_ms": round(ttft_ms, 1) if ttft_ms is not None else None,
+            "queue_ms": round(queue_ms, 1),
+            "retries": retries,
+            "cache_hit": cache_hit,
+            "error": error,
+        })
+
+
+def _retryable(error):
+    return isinstance(error, errors.APIError) and error.code in RETRY_CODES
+
+
+def _retrying(retries: int):
+    # full-jitter exponential backoff, so sessions that hit a 429 together do not retry together
+    return Retrying(
+        retry=retry_if_exception(_retryable),
+        wait=wait_random_exponential(multiplier=1, max=GEMINI_BACKOFF_MAX),
+        stop=stop_after_attempt(retries + 1),
+        reraise=True,
+    )
+
+
+class _Attempts:
+    # every attempt waits for its turn in the shared scheduler and is charged
+    # against the quotas, retries included
+    def __init__(self, label: str, contents):
+        self.priority = priority_of(label)
+        self.estimated = estimate_tokens(contents if isinstance(contents, str) else str(contents))
+        self.count = 0
+        self.queue_ms = 0.0
+
+    def admit(self):
+        self.count += 1
+        self.queue_ms += get_scheduler().acquire(self.priority, self.estimated) * 1000
+
+    def settle(self, usage):
+        if usage is not None and usage.prompt_token_count is not None:
+            get_scheduler().settle(self.estimated, usage.prompt_token_count)
+
+    @property
+    def retries(self):
+        return max(0, self.count - 1)
+
+
+def error_message(error):
+    if isinstance(error, SchedulerBusy):
+        return f"Gemini is busy: {error}. Try again in a moment."
+    return f"Gemini request failed ({error.code} {error.status or ''}). Try again in a moment."
+
+
+def record_cache_hit(label: str, model: str):
+    _record(label, model, 0.0, cache_hit=True)
+
+
+def generate(gclient, model: str, contents, label: str, config=None, retries=GEMINI_RETRIES):
+    # every non-streamed Gemini call goes through here so tokens and latency are recorded
+    with span("gemini.generate_content", call=label, model=model) as s:
+        start = time.perf_counter()
+        attempts = _Attempts(label, contents)
+
+        def attempt():
+            attempts.admit()
+            return gclient.models.generate_content(model=model, contents=contents, config=config)
+
+        try:
+            response = _retrying(retries)(attempt)
+        except Exception as e:
+            _record(label, model, (time.perf_counter() - start) * 1000, retries=attempts.retries, error=str(e),
+                    queue_ms=attempts.queue_ms)
+            s.set(retries=attempts.retries, queue_ms=attempts.queue_ms, error=str(e))
+            raise
+        attempts.settle(response.usage_metadata)
+        _record(label, model, (time.perf_counter() - start) * 1000, response.usage_metadata,
+                retries=attempts.retries, queue_ms=attempts.queue_ms)
+        s.set(retries=attempts.retries, queue_ms=attempts.queue_ms, **_usage(response.usage_metadata))
+        return response
+
+
+class TimedStream:
+    # iterates the text chunks of a streamed generation and records
+    # time-to-first-token, total generation time and token usage once it is exhausted
+    def __init__(self, gclient, model: str, contents, label: str, retries=GEMINI_RETRIES):
+        self.gclient = gclient
+        self.model = model
+        self.contents = contents
+        self.label = label
+        self.retries = retries
+        self.ttft_ms = None
+        self.total_ms = None
+        self.usage = None
+
+    def __iter__(self):
+        with span("gemini.generate_content_stream", call=self.label, model=self.model) as s:
+            yield from self._stream(s)
+
+    def _open(self, attempts):
+        # the stream is opened and read up to its first chunk under the retry
+        # policy, so only failures before anything was shown are retried
+        attempts.admit()
+        chunks = iter(self.gclient.models.generate_content_stream(model=self.model, contents=self.contents))
+        return chunks, next(chunks, None)
+
+    def _stream(self, s):
+        start = time.perf_counter()
+        attempts = _Attempts(self.label, self.contents)
+        error = None
+        try:
+            chunks, first = _retrying(self.retries)(self._open, attempts)
+            for chunk in itertools.chain([first] if first is not None else [], chunks):
+                # usage arrives with the chunks, the last one has the totals
+                self.usage = chunk.usage_metadata or self.usage
+                if not chunk.text:
+                    continue
+                if self.ttft_ms is None:
+                    self.ttft_ms = (time.perf_counter() - start) * 1000
+                yield chunk.text
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.total_ms = (time.perf_counter() - start) * 1000
+            attempts.settle(self.usage)
+            _record(self.label, self.model, self.total_ms, self.usage, retries=attempts.retries, error=error,
+                    ttft_ms=self.ttft_ms, queue_ms=attempts.queue_ms)
+            s.set(retries=attempts.retries, queue_ms=attempts.queue_ms, error=error, ttft_ms=self.ttft_ms,
+                  **_usage(self.usage))
+
+    def summary(self):
+        if self.total_ms is None:
+            return ""
+        ttft = f"{self.ttft_ms:.0f} ms" if self.ttft_ms is not None else "-"
+        text = f"First token after {ttft}, finished in {self.total_ms:.0f} ms"
+        usage = _usage(self.usage)
+        if usage["prompt_tokens"] is not None:
+            text += f", {usage['prompt_tokens']} prompt / {usage['output_tokens'] or 0} output tokens"
+        return text
+
+
+def calls():
+    with _calls_lock:
+        return list(_calls)
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+
+def call_stats():
+    # per call type and model, the expensive and slow prompts stand out here
+    groups = {}
+    for call in calls():
+        groups.setdefault((call["call"], call["model"]), []).append(call)
+    stats = []
+    for (label, model), group in groups.items():
+        made = [c for c in group if not c["cache_hit"]]
+        latencies = [c["latency_ms"] for c in made if not c["error"]]
+        queued = [c["queue_ms"] for c in made]
+        prompt_tokens = [c["prompt_tokens"] or 0 for c in made]
+        output_tokens = [c["output_tokens"] or 0 for c in made]
+        stats.append({
+            "call": label,
+            "model": model,
+            "calls": len(made),
+            "cache_hits": len(group) - len(made),
+            "errors": sum(1 for c in made if c["error"]),
+            "retries": sum(c["retries"] for c in made),
+            "prompt_tokens": sum(prompt_tokens),
+            "output_tokens": sum(output_tokens),
+            "thought_tokens": sum(c["thought_tokens"] or 0 for c in made),
+            "max_prompt_tokens": max(prompt_tokens, default=0),
+            "p50_ms": _percentile(latencies, 0.5),
+            "p95_ms": _percentile(latencies, 0.95),
+            "queue_p95_ms": _percentile(queued, 0.95),
+        })
+    return sorted(stats, key=lambda s: -s["prompt_tokens"])
+
+
+def export_json():
+    return json.dumps({"exported": time.time(), "summary": call_stats(), "calls": calls()}, indent=2)
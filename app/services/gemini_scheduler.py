@@ -0,0 +1,147 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+
+# process-wide admission control for Gemini calls, shared by every session:
+# token buckets sized to the project's quotas and a bounded priority queue
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", 1000))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", 1000000))
+GEMINI_QUEUE_SIZE = int(os.getenv("GEMINI_QUEUE_SIZE", 100))
+GEMINI_QUEUE_TIMEOUT = float(os.getenv("GEMINI_QUEUE_TIMEOUT", 120))
+WAIT_HISTORY = 1000
+
+INTERACTIVE = 0
+ANALYSIS = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", ANALYSIS: "analysis"}
+# someone is waiting on these to see anything at all, the rest are long analyses
+PRIORITIES = {
+    "intent": INTERACTIVE,
+    "intent_repair": INTERACTIVE,
+    "intent_batch": INTERACTIVE,
+    "intent_batch_repair": INTERACTIVE,
+    "pod_description": INTERACTIVE,
+}
+
+
+class SchedulerBusy(Exception):
+    pass
+
+
+def priority_of(label: str):
+    return PRIORITIES.get(label, ANALYSIS)
+
+
+class TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_for(self, amount):
+        # seconds until `amount` is available, requests above the capacity wait for a full bucket
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+
+class Scheduler:
+    def __init__(self, rpm=GEMINI_RPM, tpm=GEMINI_TPM, max_queue=GEMINI_QUEUE_SIZE, timeout=GEMINI_QUEUE_TIMEOUT):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.max_depth = 0
+        self._queue = []
+        self._seq = itertools.count()
+        self._waits = {p: deque(maxlen=WAIT_HISTORY) for p in PRIORITY_NAMES}
+        self._cond = threading.Condition()
+
+    def acquire(self, priority: int, tokens: int):
+        # blocks until this request is first in line and both buckets have room,
+        # returns the seconds spent waiting
+        start = time.monotonic()
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                self.rejected += 1
+                raise SchedulerBusy(f"{len(self._queue)} Gemini requests are already waiting")
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._queue, ticket)
+            self.max_depth = max(self.max_depth, len(self._queue))
+            try:
+                while True:
+                    now = time.monotonic()
+                    if now - start > self.timeout:
+                        self.timed_out += 1
+                        raise SchedulerBusy(f"waited {self.timeout:.0f} s for Gemini quota")
+                    if self._queue[0] == ticket:
+                        self.requests.refill(now)
+                        self.tokens.refill(now)
+                        delay = max(self.requests.wait_for(1), self.tokens.wait_for(tokens))
+                        if delay == 0:
+                            self.requests.take(1)
+                            self.tokens.take(tokens)
+                            break
+                    else:
+                        delay = None
+                    remaining = self.timeout - (now - start)
+                    self._cond.wait(remaining if delay is None else min(delay, remaining))
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+            waited = time.monotonic() - start
+            self.admitted += 1
+            self._waits[priority].append(waited)
+            return waited
+
+    def settle(self, estimated: int, actual: int):
+        # the prompt was admitted on an estimate, charge the real usage once it is known
+        with self._cond:
+            self.tokens.refill(time.monotonic())
+            self.tokens.take(actual - estimated)
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            stats = {
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self.max_depth,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "requests_available": int(self.requests.level),
+                "tokens_available": int(self.tokens.level),
+            }
+            for priority, name in PRIORITY_NAMES.items():
+                waits = sorted(self._waits[priority])
+                for q in (0.5, 0.95):
+                    value = waits[min(len(waits) - 1, int(q * len(waits)))] * 1000 if waits else None
+                    stats[f"{name}_wait_p{int(q * 100)}_ms"] = round(value, 1) if value is not None else None
+            return stats
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler()
+        return _scheduler
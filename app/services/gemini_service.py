@@ -1,50 +1,73 @@
-import os, json, streamlit as st
+import os, streamlit as st
 from dotenv import load_dotenv
-from google import genai
+from app.services import batch
+from app.services.catalog import PODNAMES
+from app.services.clients import MODEL_BACKEND, new_gemini_client
+from app.services.gemini_calls import TimedStream, error_message, record_cache_hit
+from app.services.gemini_scheduler import SchedulerBusy
+from app.services.health_store import get_health_store
+from app.services.intent_cache import get_intent_cache
+from app.services.intent_schema import intent_schema, request_intent
+from app.services.log_analysis import condense_logs
 
 load_dotenv()
 API_KEY = os.getenv("API_KEY")
-if not API_KEY:
+if not API_KEY and MODEL_BACKEND != "fake":
     st.error("API key not found.")
     st.stop()
 
-gclient = genai.Client(api_key=API_KEY)
+gclient = new_gemini_client(API_KEY)
 
-PODNAMES = [
-    "recommendationservice","emailservice","productcatalogservice",
-    "adservice","shippingservice","frontend",
-    "cartservice","currencyservice","paymentservice","checkoutservice"
-]
+INTENT_ACTIONS = ["status", "logs", "scale"]
 
 def get_gemini_intent(prompt: str):
+    cache = get_intent_cache()
+    cache_key = cache.key(prompt, PODNAMES, "gemini-2.5-flash", INTENT_ACTIONS)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        record_cache_hit("intent", "gemini-2.5-flash")
+        return cached
+
     modified_prompt = f"""
     Convert this user request into JSON with fields:
-    - action: one of [status, logs, scale]
+    - action: one of [{', '.join(INTENT_ACTIONS)}]
     - service: the pod/deployment name, one of {PODNAMES}
     - namespace: default unless specified
     - replicas: integer if scaling, else null
+    - scales: if several deployments are scaled, a list of objects with service and replicas, else null
 
     Request: {prompt}
     Respond with only valid JSON and nothing else. Do not use markdown syntax or any markdown backticks.
     """
-    response = gclient.models.generate_content(
-        model="gemini-2.5-flash", contents=modified_prompt
-    )
-    try:
-        return json.loads(response.text.strip())
-    except (json.JSONDecodeError, AttributeError):
-        st.error(f"Could not parse Gemini response: {response.text}")
+    schema = intent_schema(INTENT_ACTIONS, PODNAMES)
+    intent, text = request_intent(gclient, "gemini-2.5-flash", modified_prompt, schema)
+    if intent is None:
+        st.error(f"Could not parse Gemini response: {text}")
         return None
+    cache.put(cache_key, intent)
+    return intent
+
+def get_gemini_intents(prompts):
+    schema = intent_schema(INTENT_ACTIONS, PODNAMES)
+    return batch.classify(gclient, "gemini-2.5-flash", prompts, schema, INTENT_ACTIONS, PODNAMES)
 
 def analyze_logs_with_gemini(logs: str, service: str, prompt: str):
+    logs = condense_logs(gclient, logs, service, prompt)
     followup = f"""
     Logs for {service}:
 
     {logs}
 
     User prompt: {prompt}
+
+    Recent health history of the services:
+    {get_health_store().trend_summary()}
     """
-    resp = gclient.models.generate_content(
-        model="gemini-2.5-flash", contents=followup
-    )
-    return resp.text
+    return TimedStream(gclient, "gemini-2.5-flash", followup, "analyze_logs")
+
+def show_gemini_error(error):
+    # a full queue clears up on its own, a failed request is worth a look
+    if isinstance(error, SchedulerBusy):
+        st.warning(error_message(error))
+    else:
+        st.error(error_message(error))
@@ -0,0 +1,150 @@
+import os
+import sqlite3
+import threading
+import time
+
+HEALTH_DB = os.getenv("HEALTH_DB", "pod_health.db")
+HEALTH_NAMESPACES = [n.strip() for n in os.getenv("HEALTH_NAMESPACES", "default").split(",") if n.strip()]
+HEALTH_SAMPLE_INTERVAL = float(os.getenv("HEALTH_SAMPLE_INTERVAL", 30))
+HEALTH_RETENTION_HOURS = float(os.getenv("HEALTH_RETENTION_HOURS", 72))
+# raw samples are kept this long, older ones are thinned to one per bucket
+HEALTH_RAW_HOURS = float(os.getenv("HEALTH_RAW_HOURS", 6))
+HEALTH_BUCKET_SECONDS = int(os.getenv("HEALTH_BUCKET_SECONDS", 300))
+MAINTENANCE_INTERVAL = 600
+
+
+class HealthStore:
+    def __init__(self, path=HEALTH_DB):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._last_maintenance = 0.0
+        with self._lock:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS samples ("
+                "ts INTEGER, target TEXT, service TEXT, pod TEXT, phase TEXT, restarts INTEGER, node TEXT)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS samples_ts ON samples (ts, service)")
+            self._db.commit()
+
+    def record(self, target: str, rows, ts=None):
+        ts = int(ts or time.time())
+        values = [
+            (ts, target, row["Service"], row["Pod"], row["Status"],
+             row["Restarts"] if isinstance(row["Restarts"], int) else None,
+             row["Node"] if row["Node"] != "-" else None)
+            for row in rows
+        ]
+        with self._lock:
+            self._db.executemany("INSERT INTO samples VALUES (?, ?, ?, ?, ?, ?, ?)", values)
+            self._db.commit()
+        if time.time() - self._last_maintenance > MAINTENANCE_INTERVAL:
+            self.maintain()
+
+    def maintain(self, now=None):
+        now = now or time.time()
+        raw_cutoff = int(now - HEALTH_RAW_HOURS * 3600)
+        with self._lock:
+            self._db.execute("DELETE FROM samples WHERE ts < ?", (int(now - HEALTH_RETENTION_HOURS * 3600),))
+            # keep the last sample per pod and bucket for everything past the raw window
+            self._db.execute(
+                "DELETE FROM samples WHERE ts < ? AND rowid NOT IN ("
+                "SELECT MAX(rowid) FROM samples WHERE ts < ? GROUP BY target, pod, ts / ?)",
+                (raw_cutoff, raw_cutoff, HEALTH_BUCKET_SECONDS),
+            )
+            self._db.commit()
+        self._last_maintenance = now
+
+    def deltas(self, since_seconds=3600, service=None):
+        # per service changes over the window: restarts gained (summed over pods,
+        # so replaced pods still count), pods seen, pods that moved node and the
+        # share of samples that were not Running
+        query = (
+            "SELECT target, service, pod, MIN(restarts), MAX(restarts), COUNT(DISTINCT node), "
+            "SUM(phase != 'Running'), COUNT(*), MIN(ts), MAX(ts) FROM samples WHERE ts >= ?"
+        )
+        params = [int(time.time() - since_seconds)]
+        if service:
+            query += " AND service = ?"
+            params.append(service)
+        with self._lock:
+            rows = self._db.execute(query + " GROUP BY target, service, pod", params).fetchall()
+
+        result = {}
+        for target, svc, pod, low, high, nodes, unhealthy, samples, first, last in rows:
+            entry = result.setdefault((target, svc), {
+                "target": target, "service": svc, "restarts": 0, "pods": 0, "moved_pods": 0,
+                "unhealthy_samples": 0, "samples": 0, "first": first, "last": last,
+            })
+            entry["restarts"] += (high or 0) - (low or 0)
+            entry["pods"] += 1
+            entry["moved_pods"] += nodes > 1
+            entry["unhealthy_samples"] += unhealthy
+            entry["samples"] += samples
+            entry["first"] = min(entry["first"], first)
+            entry["last"] = max(entry["last"], last)
+        return sorted(result.values(), key=lambda e: (-e["restarts"], e["service"]))
+
+    def trend_summary(self, since_seconds=3600, service=None):
+        # a few compact lines for Gemini prompts, only services that changed
+        lines = []
+        for entry in self.deltas(since_seconds, service):
+            if not (entry["restarts"] or entry["moved_pods"] or entry["unhealthy_samples"]):
+                continue
+            line = f"{entry['service']} ({entry['target']}): +{entry['restarts']} restarts, {entry['pods']} pods"
+            if entry["moved_pods"]:
+                line += f", {entry['moved_pods']} moved node"
+            if entry["unhealthy_samples"]:
+                line += f", not Running in {entry['unhealthy_samples'] * 100 // entry['samples']}% of samples"
+            lines.append(line)
+        minutes = int(since_seconds // 60)
+        window = f"last {minutes} minutes" if minutes < 120 else f"last {minutes // 60} hours"
+        if not lines:
+            return f"No restarts, rescheduling or unhealthy pods in the {window}."
+        return f"Changes in the {window}:\n" + "\n".join(lines)
+
+
+class Sampler:
+    # records sample_fn() -> [(target, rows)] every interval on a daemon thread
+    def __init__(self, store: HealthStore, sample_fn, interval=HEALTH_SAMPLE_INTERVAL):
+        self.store = store
+        self.sample_fn = sample_fn
+        self.interval = interval
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name="health-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            try:
+                for target, rows in self.sample_fn():
+                    self.store.record(target, rows)
+                self.error = None
+            except Exception as e:
+                self.error = str(e)
+            time.sleep(self.interval)
+
+
+_store = None
+_sampler = None
+_lock = threading.Lock()
+
+
+def get_health_store():
+    global _store
+    with _lock:
+        if _store is None:
+            _store = HealthStore()
+        return _store
+
+
+def start_sampler(sample_fn):
+    # one sampler per process, later calls return the running one
+    global _sampler
+    store = get_health_store()
+    with _lock:
+        if _sampler is None:
+            _sampler = Sampler(store, sample_fn).start()
+        return _sampler
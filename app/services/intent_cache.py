@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", 512))
+INTENT_CACHE_TTL = int(os.getenv("INTENT_CACHE_TTL", 24 * 3600))
+INTENT_CACHE_DB = os.getenv("INTENT_CACHE_DB")  # optional sqlite file for the disk tier
+INTENT_CACHE_DB_ROWS = int(os.getenv("INTENT_CACHE_DB_ROWS", 10000))
+# part of every key; bump it whenever the shape of a cached intent changes so
+# entries persisted by older versions are never served
+INTENT_FORMAT_VERSION = 2
+
+
+def normalize_prompt(prompt: str):
+    return " ".join(prompt.lower().split()).strip(" .!?")
+
+
+class IntentCache:
+    # in-memory LRU in front of an optional sqlite table, both with a TTL
+    def __init__(self, maxsize=INTENT_CACHE_SIZE, ttl=INTENT_CACHE_TTL, db_path=INTENT_CACHE_DB,
+                 db_rows=INTENT_CACHE_DB_ROWS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.db_rows = db_rows
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS intents (key TEXT PRIMARY KEY, value TEXT, created REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS intents_created ON intents (created)")
+            self._db.commit()
+
+    @staticmethod
+    def key(prompt: str, podnames, model: str, actions):
+        raw = json.dumps([INTENT_FORMAT_VERSION, normalize_prompt(prompt), list(podnames), list(actions), model])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[1] < self.ttl:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return json.loads(entry[0])
+            self._memory.pop(key, None)
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created FROM intents WHERE key = ? AND created > ?", (key, now - self.ttl)
+                ).fetchone()
+                if row:
+                    self._remember(key, row[0], row[1])
+                    self.disk_hits += 1
+                    return json.loads(row[0])
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, intent):
+        value = json.dumps(intent)
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO intents VALUES (?, ?, ?)", (key, value, now))
+                self._db.execute("DELETE FROM intents WHERE created < ?", (now - self.ttl,))
+                self._db.execute(
+                    "DELETE FROM intents WHERE key NOT IN "
+                    "(SELECT key FROM intents ORDER BY created DESC LIMIT ?)", (self.db_rows,)
+                )
+                self._db.commit()
+
+    def _remember(self, key, value, created):
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "size": len(self._memory),
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_intent_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = IntentCache()
+        return _cache
@@ -0,0 +1,116 @@
+import difflib
+import os
+import re
+import threading
+
+# deterministic classifier for simple commands, anything it is not sure about
+# still goes to Gemini
+FAST_PATH_CONFIDENCE = float(os.getenv("FAST_PATH_CONFIDENCE", 0.85))
+FUZZY_SERVICE_CUTOFF = float(os.getenv("FUZZY_SERVICE_CUTOFF", 0.8))
+
+ACTION_KEYWORDS = {
+    "logs": {"log", "logs", "tail"},
+    "scale": {"scale", "replica", "replicas"},
+    "description": {"describe", "description"},
+    "status": {"status", "health", "healthy"},
+    "help": {"help"},
+}
+NEGATIONS = {"not", "don't", "dont", "never", "without"}
+# "everything except frontend", "all but cartservice": the named service is the one to leave out
+EXCLUSIONS = {"except", "excluding", "but", "besides"}
+# "scale frontend up by 2" is relative to the current replicas, which only Gemini
+# and the scale view can work out; read as absolute it would patch the wrong count
+RELATIVE_SCALE_WORDS = {"by", "up", "down", "increase", "increment", "decrease", "reduce", "add", "remove",
+                        "more", "fewer", "less", "extra", "double", "halve"}
+GENERIC_WORDS = {"service", "services", "pod", "pods", "deployment", "deployments"}
+LONG_PROMPT_WORDS = 12
+
+_stats = {"fast_path": 0, "fallback": 0}
+_stats_lock = threading.Lock()
+
+
+def match_service(word: str, podnames, cutoff=FUZZY_SERVICE_CUTOFF):
+    if word in podnames:
+        return word, 1.0
+    if word + "service" in podnames:
+        return word + "service", 0.95
+    if word.endswith("service") and word[:-len("service")] in podnames:
+        return word[:-len("service")], 0.95
+    close = difflib.get_close_matches(word, podnames, n=1, cutoff=cutoff)
+    if close:
+        return close[0], difflib.SequenceMatcher(None, word, close[0]).ratio()
+    return None, 0.0
+
+
+def classify(prompt: str, podnames):
+    # "checkout service" -> "checkoutservice"
+    words = re.findall(r"[a-z0-9'-]+", re.sub(r"\b(\w+) service\b", r"\1service", prompt.lower()))
+    if not words or (NEGATIONS | EXCLUSIONS) & set(words) or "other than" in " ".join(words):
+        return None, 0.0
+
+    actions = {action for action, keywords in ACTION_KEYWORDS.items() if keywords & set(words)}
+    if len(actions) != 1:
+        return None, 0.0
+    action = actions.pop()
+
+    found = []  # (word position, service, score)
+    for position, word in enumerate(words):
+        if len(word) < 4 or word in GENERIC_WORDS or any(word in keywords for keywords in ACTION_KEYWORDS.values()):
+            continue
+        service, score = match_service(word, podnames)
+        if service:
+            found.append((position, service, score))
+    services = {}
+    for _, service, score in found:
+        services[service] = max(score, services.get(service, 0.0))
+
+    namespace = re.search(r"\bnamespace\s+([a-z0-9-]+)", prompt.lower())
+    intent = {
+        "action": action,
+        "service": None,
+        "namespace": namespace.group(1) if namespace else "default",
+        "replicas": None,
+    }
+    if action == "help":
+        return intent, 1.0 if not services and len(words) <= 4 else 0.0
+    if action == "scale":
+        # "scale frontend to 5 and cartservice to 3": each service takes the one
+        # number between it and the next service
+        if RELATIVE_SCALE_WORDS & set(words) or not found or len(services) != len(found):
+            return None, 0.0
+        scales = []
+        for i, (position, service, _) in enumerate(found):
+            end = found[i + 1][0] if i + 1 < len(found) else len(words)
+            numbers = [w for w in words[position + 1:end] if w.isdigit()]
+            if len(numbers) != 1:
+                return None, 0.0
+            scales.append({"service": service, "replicas": int(numbers[0])})
+        if sum(w.isdigit() for w in words) != len(scales):
+            return None, 0.0
+        intent["service"], intent["replicas"] = scales[0]["service"], scales[0]["replicas"]
+        intent["scales"] = scales
+        confidence = min(services.values())
+    else:
+        if len(services) != 1:
+            return None, 0.0
+        intent["service"], confidence = services.popitem()
+    # long prompts tend to carry nuance the keywords miss
+    if len(words) > LONG_PROMPT_WORDS:
+        confidence *= 0.8
+    return intent, confidence
+
+
+def fast_intent(prompt: str, podnames, threshold=FAST_PATH_CONFIDENCE):
+    intent, confidence = classify(prompt, podnames)
+    with _stats_lock:
+        if intent and confidence >= threshold:
+            _stats["fast_path"] += 1
+            return intent
+        _stats["fallback"] += 1
+        return None
+
+
+def stats():
+    with _stats_lock:
+        total = _stats["fast_path"] + _stats["fallback"]
+        return {**_stats, "fast_path_rate": _stats["fast_path"] / total if total else 0.0}
@@ -0,0 +1,102 @@
+import functools
+import os
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Optional
+from pydantic import Field, ValidationError, create_model
+from app.services.gemini_calls import generate
+
+# intents are requested in the model's structured-output mode, constrained to a
+# schema whose service field only allows the known deployments; 0 falls back to
+# asking for JSON in the prompt, e.g. to compare parse failures
+INTENT_STRUCTURED_OUTPUT = os.getenv("INTENT_STRUCTURED_OUTPUT", "1") == "1"
+INTENT_LATENCY_HISTORY = 1000
+
+_stats = {"requests": 0, "first_try": 0, "repaired": 0, "failed": 0}
+_latencies = deque(maxlen=INTENT_LATENCY_HISTORY)
+_stats_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=16)
+def _schema(actions, podnames):
+    Action = Enum("Action", {a: a for a in actions}, type=str)
+    Service = Enum("Service", {p: p for p in podnames}, type=str) if podnames else str
+    Scale = create_model("Scale", service=(Service, ...), replicas=(int, Field(ge=0)))
+    return create_model(
+        "Intent",
+        action=(Action, ...),
+        service=(Optional[Service], None),
+        namespace=(str, "default"),
+        replicas=(Optional[int], Field(default=None, ge=0)),
+        scales=(Optional[list[Scale]], None),
+    )
+
+
+def intent_schema(actions, podnames):
+    return _schema(tuple(actions), tuple(podnames))
+
+
+def _config(schema):
+    if not INTENT_STRUCTURED_OUTPUT:
+        return None
+    return {"response_mime_type": "application/json", "response_schema": schema}
+
+
+def _parse(schema, text):
+    # markdown fences only show up without structured output
+    text = (text or "").strip().removeprefix("```json").removeprefix("```").removesuffix("```")
+    return schema.model_validate_json(text).model_dump(mode="json")
+
+
+def _count(outcome: str, started: float):
+    with _stats_lock:
+        _stats["requests"] += 1
+        _stats[outcome] += 1
+        _latencies.append((time.perf_counter() - started) * 1000)
+
+
+def request_intent(gclient, model: str, contents: str, schema, label="intent"):
+    # returns (intent dict or None, last raw answer); an answer that does not
+    # validate gets exactly one repair attempt with the validation errors
+    started = time.perf_counter()
+    response = generate(gclient, model, contents, label, config=_config(schema))
+    try:
+        intent = _parse(schema, response.text)
+        _count("first_try", started)
+        return intent, response.text
+    except ValidationError as e:
+        problems = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'answer'}: {err['msg']}" for err in e.errors())
+
+    repair = f"""
+    {contents}
+
+    Your previous answer was:
+    {response.text}
+
+    It is not valid: {problems}
+    Answer again with a corrected JSON object only.
+    """
+    response = generate(gclient, model, repair, f"{label}_repair", config=_config(schema))
+    try:
+        intent = _parse(schema, response.text)
+        _count("repaired", started)
+        return intent, response.text
+    except ValidationError:
+        _count("failed", started)
+        return None, response.text
+
+
+def stats():
+    with _stats_lock:
+        latencies = sorted(_latencies)
+        requests = _stats["requests"]
+        percentile = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 1)
+        return {
+            **_stats,
+            "structured_output": INTENT_STRUCTURED_OUTPUT,
+            "parse_failure_rate": (_stats["repaired"] + _stats["failed"]) / requests if requests else 0.0,
+            "p50_ms": percentile(0.5) if latencies else None,
+            "p95_ms": percentile(0.95) if latencies else None,
+        }
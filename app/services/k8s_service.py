@@ -1,48 +1,95 @@
 from kubernetes import client, config
 from kubernetes.client import ApiException
+from app.services import health_store, multi_cluster, pod_index
+from app.services.catalog import PODNAMES
+from app.services.log_service import fetch_logs, get_log_stream
+from app.services.pod_describer import DESCRIBE_PROFILE, describe_pod_structured
+from app.services.scaling import scale_deployments as start_rollouts
+from app.utils.tracing import span
 
 config.load_kube_config()
 v1 = client.CoreV1Api()
 apps_v1 = client.AppsV1Api()
+_context_clients = {}
 
-def get_pod_status(pod_name: str, namespace="default"):
+def kube_contexts():
+    contexts, active = config.list_kube_config_contexts()
+    return [c["name"] for c in contexts], active["name"]
+
+def clients_for(context=None):
+    if context is None:
+        return v1, apps_v1
+    if context not in _context_clients:
+        api_client = config.new_client_from_config(context=context)
+        _context_clients[context] = client.CoreV1Api(api_client), client.AppsV1Api(api_client)
+    return _context_clients[context]
+
+def client_for(context=None):
+    return clients_for(context)[0]
+
+def get_pod_status(pod_name: str, namespace="default", label_selector=None, field_selector=None, context=None):
     try:
-        pods = v1.list_namespaced_pod(namespace)
-        for pod in pods.items:
-            if pod_name in pod.metadata.name:
-                return {
-                    "Pod": pod.metadata.name,
-                    "Status": pod.status.phase,
-                    "Node": pod.spec.node_name,
-                    "Restarts": sum([c.restart_count for c in pod.status.container_statuses or []]),
-                }
+        for pod in pod_index.find_pods(client_for(context), pod_name, namespace, label_selector, field_selector):
+            return {
+                "Pod": pod.metadata.name,
+                "Status": pod.status.phase,
+                "Node": pod.spec.node_name,
+                "Restarts": sum([c.restart_count for c in pod.status.container_statuses or []]),
+            }
         return {"Pod": pod_name, "Status": "NOT FOUND", "Node": "-", "Restarts": "-"}
     except ApiException as e:
         return {"Pod": pod_name, "Status": f"ERROR: {e.reason}", "Node": "-", "Restarts": "-"}
 
-def get_logs(service: str, namespace="default", tail_lines=100):
+def describe_pod(pod_name: str, namespace="default", profile=DESCRIBE_PROFILE, label_selector=None, field_selector=None,
+                 context=None):
     try:
-        pods = v1.list_namespaced_pod(namespace)
-        for pod in pods.items:
-            if service in pod.metadata.name:
-                return v1.read_namespaced_pod_log(
-                    name=pod.metadata.name,
-                    namespace=namespace,
-                    tail_lines=tail_lines
-                )
-        return f"No pod found for {service}"
+        pod_v1 = client_for(context)
+        pods = pod_index.find_pods(pod_v1, pod_name, namespace, label_selector, field_selector)
+        if pods:
+            return describe_pod_structured(pod_v1, pods[0], profile)
+        return f"No pod found for {pod_name}"
+    except ApiException as e:
+        return f"API ERROR:{e}"
+
+def get_statuses(services, namespace="default"):
+    return pod_index.get_statuses(v1, services, namespace)
+
+def get_target_statuses(targets, services):
+    return multi_cluster.fetch_target_statuses(targets, services, client_for)
+
+def get_logs(service: str, namespace="default", tail_lines=100, label_selector=None, field_selector=None, context=None):
+    try:
+        pod_v1 = client_for(context)
+        pods = pod_index.find_pods(pod_v1, service, namespace, label_selector, field_selector)
+        if not pods:
+            return f"No pod found for {service}"
+        return fetch_logs(pod_v1, pods, namespace, tail_lines)
     except ApiException as e:
         return f"Error fetching logs for {service}: {e.reason}"
 
+def follow_logs(service: str, namespace="default", context=None):
+    pod_v1 = client_for(context)
+    return [get_log_stream(pod_v1, pod.metadata.name, namespace) for pod in pod_index.find_pods(pod_v1, service, namespace)]
+
 def scale_deployment(service: str, replicas: int, namespace="default"):
     try:
         body = {"spec": {"replicas": replicas}}
-        apps_v1.patch_namespaced_deployment_scale(
-            name=service, namespace=namespace, body=body
-        )
+        with span("k8s.patch_namespaced_deployment_scale", service=service, namespace=namespace, replicas=replicas):
+            apps_v1.patch_namespaced_deployment_scale(
+                name=service, namespace=namespace, body=body
+            )
         return f"Scaled {service} to {replicas} replicas."
     except ApiException as e:
         return f"Error scaling {service}: {e.reason}"
 
+def scale_deployments(items, namespace="default", context=None):
+    return start_rollouts(clients_for(context)[1], items, namespace)
 
+def sample_health():
+    return [
+        (multi_cluster.target_label((None, namespace)), pod_index.get_statuses(v1, PODNAMES, namespace)[0])
+        for namespace in health_store.HEALTH_NAMESPACES
+    ]
 
+def start_health_sampler():
+    return health_store.start_sampler(sample_health)
@@ -0,0 +1,71 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from app.services.gemini_calls import generate
+from app.utils.tokens import CHARS_PER_TOKEN, estimate_tokens
+from app.utils.tracing import in_context
+
+LOG_CHUNK_TOKENS = int(os.getenv("LOG_CHUNK_TOKENS", 8000))
+LOG_MAP_WORKERS = int(os.getenv("LOG_MAP_WORKERS", 4))
+LOG_TOKEN_BUDGET = int(os.getenv("LOG_TOKEN_BUDGET", 200000))
+MAP_SUMMARY_TOKENS = int(os.getenv("LOG_MAP_SUMMARY_TOKENS", 512))
+
+
+def chunk_logs(logs: str, chunk_tokens=LOG_CHUNK_TOKENS):
+    chunks, current, size = [], [], 0
+    for line in logs.splitlines():
+        line = line[: chunk_tokens * CHARS_PER_TOKEN]
+        tokens = estimate_tokens(line)
+        if current and size + tokens > chunk_tokens:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def fit_budget(chunks, token_budget=LOG_TOKEN_BUDGET):
+    # keep the most recent chunks that fit, the tail of a log is usually what matters
+    kept, total = [], 0
+    for chunk in reversed(chunks):
+        tokens = estimate_tokens(chunk)
+        if kept and total + tokens > token_budget:
+            break
+        kept.append(chunk)
+        total += tokens
+    kept.reverse()
+    return kept, len(chunks) - len(kept)
+
+
+def summarize_chunk(gclient, chunk: str, index: int, total: int, service: str, prompt: str, model: str):
+    map_prompt = f"""
+    Below is part {index + 1} of {total} of the logs for the {service} of my application.
+
+    {chunk}
+
+    Summarize this part for someone who has to answer: {prompt}
+    Keep errors, warnings, failing requests, counts and their timestamps. Be brief.
+    """
+    response = generate(gclient, model, map_prompt, "log_chunk_summary", config={"max_output_tokens": MAP_SUMMARY_TOKENS})
+    return response.text or ""
+
+
+def condense_logs(gclient, logs: str, service: str, prompt: str, model="gemini-2.5-flash",
+                  chunk_tokens=LOG_CHUNK_TOKENS, workers=LOG_MAP_WORKERS, token_budget=LOG_TOKEN_BUDGET):
+    # map step: logs that fit one chunk go to the final prompt as-is, longer logs
+    # are summarized chunk by chunk in parallel and the summaries take their place
+    chunks = chunk_logs(logs or "", chunk_tokens)
+    if len(chunks) <= 1:
+        return logs
+    chunks, skipped = fit_budget(chunks, token_budget)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as pool:
+        summaries = list(pool.map(
+            in_context(lambda i: summarize_chunk(gclient, chunks[i], i, len(chunks), service, prompt, model)),
+            range(len(chunks)),
+        ))
+
+    header = f"(Summaries of {len(chunks)} consecutive log chunks, oldest first"
+    header += f"; {skipped} older chunks skipped to stay within the token budget)" if skipped else ")"
+    return header + "\n\n" + "\n\n".join(f"--- Chunk {i + 1} ---\n{s}" for i, s in enumerate(summaries))
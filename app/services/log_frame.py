@@ -0,0 +1,94 @@
+import io
+import json
+import re
+import pandas as pd
+
+# "<kubelet timestamp> [<pod>] {...}" as produced by fetch_logs, "[<pod>] {...}"
+# from the multi-pod live view or a bare JSON line
+JSON_LINE = re.compile(r"^(?:(\d\S*) )?(?:\[([^\]]+)\] )?(\{.*\})\s*$")
+ERROR_SEVERITIES = ["ERROR", "CRITICAL", "FATAL"]
+SAMPLE_LINES = 20
+
+
+def parse_json_logs(logs: str):
+    # JSON lines (e.g. from CustomJsonFormatter) into a frame with timestamp,
+    # severity, logger, message and pod columns; other lines are ignored
+    kubelet_ts, pods, bodies = [], [], []
+    total = 0
+    for line in logs.splitlines():
+        total += 1
+        match = JSON_LINE.match(line)
+        if match:
+            kubelet_ts.append(match.group(1))
+            pods.append(match.group(2))
+            bodies.append(match.group(3))
+    if not bodies:
+        return pd.DataFrame(columns=["timestamp", "severity", "logger", "message", "pod"]), total
+
+    try:
+        raw = pd.read_json(io.StringIO("\n".join(bodies)), lines=True, convert_dates=False)
+    except ValueError:
+        # one broken line fails the bulk parse, fall back to line by line
+        records, keep = [], []
+        for i, body in enumerate(bodies):
+            try:
+                records.append(json.loads(body))
+                keep.append(i)
+            except json.JSONDecodeError:
+                pass
+        raw = pd.DataFrame.from_records(records)
+        kubelet_ts = [kubelet_ts[i] for i in keep]
+        pods = [pods[i] for i in keep]
+
+    frame = pd.DataFrame(index=raw.index)
+    logged = raw["timestamp"] if "timestamp" in raw else pd.Series(index=raw.index, dtype="float64")
+    # epoch seconds (python services) or ISO strings (go services), else the kubelet's timestamp
+    numeric = pd.to_numeric(logged, errors="coerce")
+    iso = pd.to_datetime(logged.where(numeric.isna()), utc=True, errors="coerce", format="ISO8601")
+    frame["timestamp"] = pd.to_datetime(numeric, unit="s", utc=True, errors="coerce").fillna(iso).fillna(
+        pd.to_datetime(pd.Series(kubelet_ts, index=raw.index), utc=True, errors="coerce", format="ISO8601")
+    )
+    severity = raw.get("severity", raw.get("levelname", pd.Series("INFO", index=raw.index)))
+    frame["severity"] = severity.fillna("INFO").astype(str).str.upper()
+    frame["logger"] = raw.get("name", pd.Series("", index=raw.index)).fillna("").astype(str)
+    frame["message"] = raw.get("message", pd.Series("", index=raw.index)).fillna("").astype(str)
+    frame["pod"] = pd.Series(pods, index=raw.index)
+    return frame, total
+
+
+def aggregate(frame, top=10):
+    errors = frame["severity"].isin(ERROR_SEVERITIES)
+    timed = frame.assign(error=errors).dropna(subset=["timestamp"]).set_index("timestamp")
+    per_minute = timed.resample("1min").agg(lines=("message", "size"), errors=("error", "sum"))
+    per_minute["error_rate"] = (per_minute["errors"] / per_minute["lines"]).fillna(0.0).round(3)
+    return {
+        "severity": frame["severity"].value_counts(),
+        "per_minute": per_minute,
+        "top_messages": frame["message"].value_counts().head(top),
+        "top_errors": frame.loc[errors, "message"].value_counts().head(top),
+    }
+
+
+def summarize_for_gemini(frame, total_lines: int, sample_lines=SAMPLE_LINES):
+    # aggregates plus a small sample, instead of every raw line
+    aggregates = aggregate(frame)
+    per_minute = aggregates["per_minute"]
+    busiest = per_minute[per_minute["errors"] > 0].tail(15)
+    errors = frame[frame["severity"].isin(ERROR_SEVERITIES)].tail(sample_lines // 2)
+    sample = pd.concat([errors, frame.tail(sample_lines - len(errors))])
+    sample = sample[~sample.index.duplicated()].sort_index()
+
+    def counts(series):
+        return "\n".join(f"  {count} x {value}" for value, count in series.items()) or "  none"
+
+    return f"""{len(frame)} JSON log lines out of {total_lines}, from {frame['timestamp'].min()} to {frame['timestamp'].max()}.
+Severity counts:
+{counts(aggregates['severity'])}
+Minutes with errors (lines, errors, error rate):
+{chr(10).join(f"  {row.Index:%H:%M} {row.lines} {row.errors} {row.error_rate}" for row in busiest.itertuples()) or "  none"}
+Most frequent messages:
+{counts(aggregates['top_messages'])}
+Most frequent error messages:
+{counts(aggregates['top_errors'])}
+Sample lines (timestamp, pod, severity, logger, message):
+{chr(10).join(f"  {r.timestamp} {r.pod or ''} {r.severity} {r.logger} {r.message}" for r in sample.itertuples())}"""
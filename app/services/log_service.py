@@ -0,0 +1,189 @@
+import heapq
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from kubernetes import watch
+from kubernetes.client import ApiException
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+from app.services import singleflight
+from app.utils.tracing import in_context, span
+
+LOG_BUFFER_LINES = 2000
+IDLE_TIMEOUT = 300
+# a follow connection that delivers nothing for this long is reopened, so
+# stop() and idleness are noticed on quiet pods too
+FOLLOW_READ_TIMEOUT = 30
+LOG_FETCH_WORKERS = 8
+
+
+class LogStream:
+    # follows one pod's log on a background thread into a fixed-size ring buffer
+    def __init__(self, v1, pod: str, namespace="default", container=None, tail_lines=100, maxlen=LOG_BUFFER_LINES):
+        self.v1 = v1
+        self.pod = pod
+        self.namespace = namespace
+        self.container = container
+        self.tail_lines = tail_lines
+        self.error = None
+        self._lines = deque(maxlen=maxlen)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._last_line_at = None
+        self._last_timestamp = None
+        self._connected_at = None
+        self._last_read_at = time.monotonic()
+        self._thread = None
+
+    @property
+    def alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"logs-{self.pod}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _idle(self):
+        return time.monotonic() - self._last_read_at > IDLE_TIMEOUT
+
+    def _run(self):
+        try:
+            self._follow()
+        finally:
+            _forget(self)
+
+    def _follow(self):
+        backoff = 1
+        while not self._stopped.is_set() and not self._idle():
+            kwargs = {"name": self.pod, "namespace": self.namespace, "follow": True, "timestamps": True,
+                      "_request_timeout": (10, FOLLOW_READ_TIMEOUT)}
+            if self.container:
+                kwargs["container"] = self.container
+            resume_from = self._last_line_at or self._connected_at
+            if resume_from is None:
+                kwargs["tail_lines"] = self.tail_lines
+                self._connected_at = time.time()
+            else:
+                # resume roughly where the previous connection dropped off, the
+                # lines it repeats are dropped by their timestamps below
+                kwargs["since_seconds"] = max(1, math.ceil(time.time() - resume_from))
+            try:
+                w = watch.Watch()
+                for line in w.stream(self.v1.read_namespaced_pod_log, **kwargs):
+                    if self._stopped.is_set() or self._idle():
+                        w.stop()
+                        break
+                    timestamp, _, message = line.partition(" ")
+                    key = _sort_key(timestamp)
+                    if self._last_timestamp is not None and key <= self._last_timestamp:
+                        continue
+                    self._last_timestamp = key
+                    with self._lock:
+                        self._lines.append(message)
+                        self._seq += 1
+                    self._last_line_at = time.time()
+                self.error = None
+                backoff = 1
+            except (ReadTimeoutError, ProtocolError):
+                # a quiet pod, not an error
+                self.error = None
+                backoff = 1
+            except Exception as e:
+                self.error = str(e)
+                backoff = min(backoff * 2, 30)
+            time.sleep(backoff)
+
+    def lines(self):
+        self._last_read_at = time.monotonic()
+        with self._lock:
+            return list(self._lines)
+
+    def lines_since(self, cursor: int):
+        # returns the lines appended after `cursor` and the new cursor; lines that
+        # already fell out of the ring buffer are skipped
+        self._last_read_at = time.monotonic()
+        with self._lock:
+            available = min(self._seq - cursor, len(self._lines))
+            new = list(self._lines)[len(self._lines) - available:] if available > 0 else []
+            return new, self._seq
+
+
+def _sort_key(timestamp: str):
+    # kubelet emits RFC3339Nano with trailing zeros trimmed, pad the fraction so
+    # timestamps compare correctly as strings
+    base, _, fraction = timestamp.rstrip("Z").partition(".")
+    return f"{base}.{fraction.ljust(9, '0')}"
+
+
+def _timestamped_lines(tag: str, text: str):
+    for line in text.splitlines():
+        timestamp, _, message = line.partition(" ")
+        yield _sort_key(timestamp), timestamp, tag, message
+
+
+def merge_logs(results):
+    # results: [(tag, log text with timestamps)], each already in time order
+    merged = heapq.merge(*[_timestamped_lines(tag, text) for tag, text in results])
+    return "\n".join(f"{timestamp} [{tag}] {message}" for _, timestamp, tag, message in merged)
+
+
+def fetch_logs(v1, pods, namespace="default", tail_lines=100, max_workers=LOG_FETCH_WORKERS):
+    targets = []
+    for pod in pods:
+        containers = [c.name for c in pod.spec.containers]
+        for container in containers:
+            tag = pod.metadata.name if len(containers) == 1 else f"{pod.metadata.name}/{container}"
+            targets.append((tag, pod.metadata.name, container))
+
+    def fetch(target):
+        tag, pod, container = target
+        with span("k8s.read_namespaced_pod_log", namespace=namespace, pod=pod, container=container) as s:
+            try:
+                text = singleflight.call(
+                    v1,
+                    v1.read_namespaced_pod_log,
+                    name=pod,
+                    namespace=namespace,
+                    container=container,
+                    tail_lines=tail_lines,
+                    timestamps=True,
+                )
+                s.set(bytes=len(text))
+                return tag, text
+            except ApiException as e:
+                s.set(error=e.reason)
+                return tag, f"- error fetching logs: {e.reason}"
+
+    with span("k8s.fetch_logs", namespace=namespace, pods=len(pods), containers=len(targets)) as s:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(targets)))) as pool:
+            results = list(pool.map(in_context(fetch), targets))
+        logs = merge_logs(results)
+        s.set(bytes=len(logs))
+    return logs
+
+
+_streams = {}
+_streams_lock = threading.Lock()
+
+
+def _forget(stream):
+    # a stream whose thread ended (stopped or idle) is dropped, the next caller starts a new one
+    with _streams_lock:
+        for key in [k for k, s in _streams.items() if s is stream]:
+            del _streams[key]
+
+
+def get_log_stream(v1, pod: str, namespace="default", container=None):
+    key = (id(v1.api_client), namespace, pod, container)
+    with _streams_lock:
+        stream = _streams.get(key)
+        if stream is None or not stream.alive:
+            stream = LogStream(v1, pod, namespace, container)
+            stream.start()
+            _streams[key] = stream
+        return stream
@@ -0,0 +1,158 @@
+import os
+import re
+
+LOG_TEMPLATE_SIMILARITY = float(os.getenv("LOG_TEMPLATE_SIMILARITY", 0.5))
+LOG_TEMPLATE_DEPTH = int(os.getenv("LOG_TEMPLATE_DEPTH", 2))
+LOG_TEMPLATE_TOP = int(os.getenv("LOG_TEMPLATE_TOP", 200))
+# clusters compared per leaf, bounds the work per line so mining stays linear
+MAX_LEAF_CLUSTERS = 64
+EXAMPLES = 3
+WILDCARD = "<*>"
+
+# optional "<kubelet timestamp> " and "[<pod>] " prefixes added by fetch_logs and the live view
+PREFIX = re.compile(r"^(?:(\d{4}-\d\d-\d\dT\S+) )?(?:\[([^\]]+)\] )?(.*)$")
+
+
+def _mask(token: str):
+    # tokens with digits are treated as parameters, "key=value" keeps its key
+    if not any(c.isdigit() for c in token):
+        return token
+    key, sep, _ = token.partition("=")
+    if sep and key and not any(c.isdigit() for c in key):
+        return f"{key}={WILDCARD}"
+    return WILDCARD
+
+
+def _param(template_token: str, token: str):
+    if template_token == WILDCARD:
+        return token
+    if template_token.endswith("=" + WILDCARD):
+        return token.partition("=")[2]
+    return None
+
+
+def _generalize(template_token: str, token: str):
+    if template_token == token:
+        return template_token
+    key, sep, _ = template_token.partition("=")
+    if sep and token.startswith(key + "="):
+        return f"{key}={WILDCARD}"
+    return WILDCARD
+
+
+class Template:
+    __slots__ = ("tokens", "count", "first", "last", "examples")
+
+    def __init__(self, tokens, timestamp):
+        self.tokens = tokens
+        self.count = 0
+        self.first = timestamp
+        self.last = timestamp
+        self.examples = []
+
+    @property
+    def text(self):
+        return " ".join(self.tokens)
+
+    def similarity(self, masked):
+        # masked parameters match the template's wildcards, ties go to the more general template
+        same = wildcards = 0
+        for t, m in zip(self.tokens, masked):
+            if t == m:
+                same += 1
+            if t == WILDCARD:
+                wildcards += 1
+        return same / len(masked), wildcards
+
+    def merge(self, masked):
+        self.tokens = [_generalize(t, m) for t, m in zip(self.tokens, masked)]
+
+    def add(self, raw, timestamp):
+        self.count += 1
+        if timestamp:
+            self.first = self.first or timestamp
+            self.last = timestamp
+        # raw tokens are kept, parameters depend on how general the template ends up
+        if len(self.examples) < EXAMPLES and raw not in self.examples:
+            self.examples.append(raw)
+
+    def params(self):
+        examples = [[p for p in map(_param, self.tokens, raw) if p is not None] for raw in self.examples]
+        return [p for p in examples if p]
+
+
+class TemplateMiner:
+    # online clustering in the style of Drain: lines are grouped by token count and
+    # their first tokens, then joined to the most similar template in that group
+    def __init__(self, similarity=LOG_TEMPLATE_SIMILARITY, depth=LOG_TEMPLATE_DEPTH):
+        self.similarity = similarity
+        self.depth = depth
+        self.lines = 0
+        self.chars = 0
+        self._leaves = {}
+        self.templates = []
+
+    def add(self, line: str):
+        self.lines += 1
+        self.chars += len(line) + 1
+        timestamp, _, message = PREFIX.match(line).groups()
+        raw = message.split()
+        if not raw:
+            return None
+        masked = [_mask(t) for t in raw]
+        key = (len(masked), *masked[: self.depth])
+        leaf = self._leaves.setdefault(key, [])
+
+        best, best_score = None, (-1.0, -1)
+        for template in leaf:
+            score = template.similarity(masked)
+            if score > best_score:
+                best, best_score = template, score
+        if best is not None and (best_score[0] >= self.similarity or len(leaf) >= MAX_LEAF_CLUSTERS):
+            best.merge(masked)
+        else:
+            best = Template(masked, timestamp)
+            leaf.append(best)
+            self.templates.append(best)
+        best.add(raw, timestamp)
+        return best
+
+    def add_logs(self, logs: str):
+        for line in logs.splitlines():
+            self.add(line)
+        return self
+
+    def rows(self):
+        return [
+            {"Count": t.count, "Template": t.text, "First": t.first, "Last": t.last,
+             "Examples": " | ".join(", ".join(p) for p in t.params())}
+            for t in sorted(self.templates, key=lambda t: -t.count)
+        ]
+
+    def to_text(self, top=LOG_TEMPLATE_TOP):
+        # compact Gemini context, the most frequent templates first
+        ranked = sorted(self.templates, key=lambda t: -t.count)
+        lines = [
+            f"{len(self.templates)} templates for {self.lines} log lines; {WILDCARD} marks a varying parameter.",
+            "count x template [first seen .. last seen] e.g. example parameters",
+        ]
+        for t in ranked[:top]:
+            line = f"{t.count} x {t.text}"
+            if t.first:
+                line += f" [{t.first} .. {t.last}]" if t.last != t.first else f" [{t.first}]"
+            params = t.params()
+            if params:
+                line += " e.g. " + " | ".join(", ".join(p)[:200] for p in params)
+            lines.append(line)
+        rest = ranked[top:]
+        if rest:
+            lines.append(f"({len(rest)} rarer templates covering {sum(t.count for t in rest)} lines omitted)")
+        return "\n".join(lines)
+
+    def compression_ratio(self, text=None):
+        text = self.to_text() if text is None else text
+        return self.chars / max(len(text), 1)
+
+
+def mine_templates(logs: str, similarity=LOG_TEMPLATE_SIMILARITY, depth=LOG_TEMPLATE_DEPTH):
+    return TemplateMiner(similarity, depth).add_logs(logs or "")
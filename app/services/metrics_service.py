@@ -0,0 +1,184 @@
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+from kubernetes import client
+from kubernetes.utils import parse_quantity
+from app.services.pod_cache import K8S_REQUEST_TIMEOUT, get_pod_cache
+from app.utils.tracing import in_context, span
+
+METRICS_HISTORY = int(os.getenv("METRICS_HISTORY", 120))
+# metrics-server scrapes every ~15s, polling faster only repeats samples
+METRICS_INTERVAL = float(os.getenv("METRICS_INTERVAL", 15))
+METRICS_FAKE = os.getenv("METRICS_FAKE", "").lower() in ("1", "true", "yes")
+
+# metrics are read off the status path, a slow metrics-server only leaves the
+# usage columns a refresh behind
+_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="metrics")
+
+
+class SeriesRing:
+    # fixed-size, array-backed time series of (timestamp, cpu cores, memory bytes)
+    def __init__(self, capacity=METRICS_HISTORY):
+        self.capacity = capacity
+        self.count = 0
+        self._data = np.zeros((capacity, 3))
+
+    def append(self, timestamp: float, cpu: float, memory: float):
+        if self.count and timestamp <= self._data[(self.count - 1) % self.capacity, 0]:
+            return
+        self._data[self.count % self.capacity] = (timestamp, cpu, memory)
+        self.count += 1
+
+    def values(self):
+        if self.count < self.capacity:
+            return self._data[: self.count]
+        return np.roll(self._data, -(self.count % self.capacity), axis=0)
+
+    def memory_rate(self):
+        # bytes per second over the buffered window
+        data = self.values()
+        if len(data) < 2 or data[-1, 0] == data[0, 0]:
+            return 0.0
+        return float((data[-1, 2] - data[0, 2]) / (data[-1, 0] - data[0, 0]))
+
+
+class FakeMetricsApi:
+    # stands in for metrics.k8s.io (METRICS_FAKE=1), with synthetic usage for the pods in the cache
+    def __init__(self, v1):
+        self.v1 = v1
+        self._nodes = set()
+
+    def _usage(self, name: str, now: float):
+        seed = sum(map(ord, name))
+        cpu = 0.05 + 0.04 * math.sin(now / 60 + seed) + random.uniform(0, 0.01)
+        memory = (64 + seed % 64) * 2**20 * (1 + 0.1 * math.sin(now / 300 + seed))
+        return {"cpu": f"{int(cpu * 1e9)}n", "memory": f"{int(memory / 1024)}Ki"}
+
+    def list_namespaced_custom_object(self, group, version, namespace, plural, **kwargs):
+        now = time.time()
+        stamp = datetime.fromtimestamp(now).astimezone().isoformat()
+        pods = get_pod_cache(self.v1, namespace).pods()
+        self._nodes.update(pod.spec.node_name for pod in pods if pod.spec.node_name)
+        return {"items": [
+            {"metadata": {"name": pod.metadata.name}, "timestamp": stamp,
+             "containers": [{"name": c.name, "usage": self._usage(pod.metadata.name + c.name, now)}
+                            for c in pod.spec.containers]}
+            for pod in pods
+        ]}
+
+    def list_cluster_custom_object(self, group, version, plural, **kwargs):
+        now = time.time()
+        stamp = datetime.fromtimestamp(now).astimezone().isoformat()
+        return {"items": [{"metadata": {"name": n}, "timestamp": stamp, "usage": self._usage(n, now)} for n in self._nodes]}
+
+
+def metrics_api_for(v1):
+    if METRICS_FAKE:
+        return FakeMetricsApi(v1)
+    return client.CustomObjectsApi(v1.api_client)
+
+
+def _usage(usage):
+    return float(parse_quantity(usage.get("cpu", "0"))), float(parse_quantity(usage.get("memory", "0")))
+
+
+def fetch_pod_metrics(metrics_api, namespace="default"):
+    # one call for every pod in the namespace
+    with span("k8s.list_pod_metrics", namespace=namespace) as s:
+        response = metrics_api.list_namespaced_custom_object("metrics.k8s.io", "v1beta1", namespace, "pods",
+                                                             _request_timeout=K8S_REQUEST_TIMEOUT)
+        s.set(pods=len(response["items"]))
+    samples = {}
+    for item in response["items"]:
+        cpu = memory = 0.0
+        for container in item.get("containers", []):
+            c, m = _usage(container["usage"])
+            cpu += c
+            memory += m
+        timestamp = datetime.fromisoformat(item["timestamp"].replace("Z", "+00:00")).timestamp()
+        samples[item["metadata"]["name"]] = (timestamp, cpu, memory)
+    return samples
+
+
+def fetch_node_metrics(metrics_api):
+    with span("k8s.list_node_metrics") as s:
+        response = metrics_api.list_cluster_custom_object("metrics.k8s.io", "v1beta1", "nodes",
+                                                          _request_timeout=K8S_REQUEST_TIMEOUT)
+        s.set(nodes=len(response["items"]))
+    return {item["metadata"]["name"]: _usage(item["usage"]) for item in response["items"]}
+
+
+class MetricsStore:
+    def __init__(self, capacity=METRICS_HISTORY, interval=METRICS_INTERVAL):
+        self.capacity = capacity
+        self.interval = interval
+        self._series = {}
+        self._nodes = {}
+        self._fetched_at = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def refresh(self, v1, namespace="default"):
+        # at most one pod + one node metrics call per cluster/namespace and interval,
+        # run in the background; returns its future, None if none was due
+        key = (id(v1.api_client), namespace)
+        with self._lock:
+            if key in self._refreshing or time.monotonic() - self._fetched_at.get(key, float("-inf")) < self.interval:
+                return None
+            self._fetched_at[key] = time.monotonic()
+            self._refreshing.add(key)
+        return _pool.submit(in_context(self._refresh), v1, namespace, key)
+
+    def _refresh(self, v1, namespace, key):
+        try:
+            metrics_api = metrics_api_for(v1)
+            pods = fetch_pod_metrics(metrics_api, namespace)
+            nodes = fetch_node_metrics(metrics_api)
+        except Exception:
+            # missing or slow metrics-server, the columns keep the last samples
+            return
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+        with self._lock:
+            # pods missing from the response are gone, every rollout renames them
+            known = self._series.get(key, {})
+            self._series[key] = {pod: known.get(pod) or SeriesRing(self.capacity) for pod in pods}
+            for pod, sample in pods.items():
+                self._series[key][pod].append(*sample)
+            self._nodes[key[0]] = nodes
+
+    def series(self, v1, namespace: str, pod: str):
+        with self._lock:
+            return self._series.get((id(v1.api_client), namespace), {}).get(pod)
+
+    def node_usage(self, v1, node: str):
+        return self._nodes.get(id(v1.api_client), {}).get(node)
+
+
+_store = MetricsStore()
+
+
+def add_usage(rows, v1, namespace="default", store=_store):
+    # adds usage columns to dashboard rows; the dashboard still renders when
+    # metrics-server is missing or slow
+    start = time.perf_counter()
+    try:
+        store.refresh(v1, namespace)
+    except Exception:
+        pass
+    for row in rows:
+        series = store.series(v1, namespace, row["Pod"])
+        data = series.values() if series else np.zeros((0, 3))
+        node = store.node_usage(v1, row["Node"]) if row["Node"] != "-" else None
+        row["CPU (m)"] = round(data[-1, 1] * 1000) if len(data) else None
+        row["Memory (Mi)"] = round(data[-1, 2] / 2**20) if len(data) else None
+        row["Memory rate (Ki/s)"] = round(series.memory_rate() / 1024, 1) if series else None
+        row["CPU trend"] = (data[:, 1] * 1000).round().tolist()
+        row["Node CPU (m)"] = round(node[0] * 1000) if node else None
+    return (time.perf_counter() - start) * 1000
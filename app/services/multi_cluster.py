@@ -0,0 +1,90 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from kubernetes.client import ApiException
+from app.services import metrics_service, pod_index
+from app.utils.tracing import in_context, span
+
+TARGET_TIMEOUT = float(os.getenv("TARGET_TIMEOUT", 5))
+TARGET_WORKERS = int(os.getenv("TARGET_WORKERS", 16))
+
+# shared pool: a target that times out keeps loading in the background and is
+# usually warm in its pod cache by the next render; renders while it is still
+# loading wait on that same future, so a hung cluster holds one worker at most
+_pool = ThreadPoolExecutor(max_workers=TARGET_WORKERS, thread_name_prefix="targets")
+_running = {}
+_running_lock = threading.Lock()
+
+
+def target_label(target):
+    context, namespace = target
+    return f"{context or 'current'}/{namespace}"
+
+
+def intent_target(target, intent):
+    # the one target logs, descriptions and scaling act on: the one picked on
+    # the dashboard, in the namespace the prompt names if it names one
+    context, namespace = target or (None, "default")
+    named = (intent or {}).get("namespace")
+    return context, named if named and named != "default" else namespace
+
+
+def _fetch(v1, target, services, with_usage):
+    context, namespace = target
+    with span("dashboard.target", context=context or "current", namespace=namespace) as s:
+        rows, timings = pod_index.get_statuses(v1, services, namespace)
+        if with_usage:
+            timings["metrics_ms"] = metrics_service.add_usage(rows, v1, namespace)
+            timings["total_ms"] = timings.get("total_ms", 0.0) + timings["metrics_ms"]
+        s.set(rows=len(rows), pods=timings.get("pods"))
+    return rows, timings
+
+
+def _submit(client_for, target, services, with_usage):
+    # keyed by the client, not client_for, which main.py redefines on every rerun
+    try:
+        v1 = client_for(target[0])
+    except Exception as e:
+        future = Future()
+        future.set_exception(e)
+        return future
+    key = (id(v1.api_client), target[1], tuple(services), with_usage)
+    with _running_lock:
+        future = _running.get(key)
+        if future is not None and not future.done():
+            return future
+        future = _running[key] = _pool.submit(in_context(_fetch), v1, target, services, with_usage)
+    future.add_done_callback(lambda f: _forget(key, f))
+    return future
+
+
+def _forget(key, future):
+    with _running_lock:
+        if _running.get(key) is future:
+            del _running[key]
+
+
+def fetch_target_statuses(targets, services, client_for, timeout=TARGET_TIMEOUT, with_usage=True):
+    # targets: [(context, namespace)], client_for(context) -> CoreV1Api
+    start = time.perf_counter()
+    futures = {target: _submit(client_for, target, services, with_usage) for target in targets}
+    deadline = time.monotonic() + timeout
+
+    rows, timings = [], {}
+    for target, future in futures.items():
+        context, namespace = target
+        try:
+            target_rows, target_timings = future.result(timeout=max(0, deadline - time.monotonic()))
+            timings[target_label(target)] = target_timings.get("total_ms")
+        except TimeoutError:
+            target_rows = [{"Service": s, "Pod": s, "Status": "TIMEOUT", "Node": "-", "Restarts": "-"} for s in services]
+            timings[target_label(target)] = "timeout"
+        except Exception as e:
+            reason = e.reason if isinstance(e, ApiException) else str(e)
+            target_rows = [{"Service": s, "Pod": s, "Status": f"ERROR: {reason}", "Node": "-", "Restarts": "-"} for s in services]
+            timings[target_label(target)] = "error"
+        rows.extend({"Context": context or "current", "Namespace": namespace, **row} for row in target_rows)
+
+    timings["total_ms"] = (time.perf_counter() - start) * 1000
+    return rows, timings
@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+from kubernetes import watch
+from kubernetes.client import ApiException
+from app.services import singleflight
+from app.utils.tracing import span
+
+LIST_PAGE_SIZE = int(os.getenv("POD_LIST_PAGE_SIZE", 500))
+# optional label selector that limits what the cache holds, e.g. "app" for pods with an app label
+POD_CACHE_SELECTOR = os.getenv("POD_CACHE_SELECTOR")
+# seconds a single list or metrics call may take, so a hung cluster frees its worker
+K8S_REQUEST_TIMEOUT = float(os.getenv("K8S_REQUEST_TIMEOUT", 30))
+# caches of namespaces nobody asked about for this long are stopped, and at
+# most this many are kept (namespaces come from a free-text field)
+POD_CACHE_IDLE = float(os.getenv("POD_CACHE_IDLE", 600))
+POD_CACHE_MAX = int(os.getenv("POD_CACHE_MAX", 32))
+
+
+def list_pods_paged(v1, namespace="default", label_selector=None, field_selector=None, limit=LIST_PAGE_SIZE):
+    # yields pages of pods using limit/_continue, so a huge namespace is never
+    # held as one response; the resourceVersion of the list is on every page
+    kwargs = {"limit": limit, "_request_timeout": K8S_REQUEST_TIMEOUT}
+    if label_selector:
+        kwargs["label_selector"] = label_selector
+    if field_selector:
+        kwargs["field_selector"] = field_selector
+    while True:
+        with span("k8s.list_namespaced_pod", namespace=namespace, label_selector=label_selector,
+                  field_selector=field_selector) as s:
+            page = singleflight.call(v1, v1.list_namespaced_pod, namespace, **kwargs)
+            s.set(pods=len(page.items))
+        yield page
+        if not page.metadata._continue:
+            return
+        kwargs["_continue"] = page.metadata._continue
+
+
+def list_pods(v1, namespace="default", label_selector=None, field_selector=None, limit=LIST_PAGE_SIZE):
+    for page in list_pods_paged(v1, namespace, label_selector, field_selector, limit):
+        yield from page.items
+
+
+def pod_keys(pod):
+    # every service name a single-service lookup can match this pod under: its
+    # app label and the deployment owning its ReplicaSet, or each name prefix
+    # when it has neither, the same precedence as pod_index.service_for_pod
+    keys = set()
+    labels = pod.metadata.labels or {}
+    if labels.get("app"):
+        keys.add(labels["app"])
+    for ref in pod.metadata.owner_references or []:
+        if ref.kind == "ReplicaSet":
+            keys.add(ref.name.rsplit("-", 1)[0])
+    if not keys:
+        parts = pod.metadata.name.split("-")
+        keys.update("-".join(parts[:i]) for i in range(1, len(parts)))
+    return keys
+
+
+# informer-style pod cache: one list+watch per namespace, shared by every
+# streamlit session in the process; besides the pods by name it keeps a
+# service -> pod names index that the watch updates incrementally
+
+
+class PodCache:
+    def __init__(self, v1, namespace: str, label_selector=POD_CACHE_SELECTOR, watch_timeout=300):
+        self.v1 = v1
+        self.namespace = namespace
+        self.label_selector = label_selector
+        self.watch_timeout = watch_timeout
+        self._pods = {}
+        self._index = {}
+        self._keys = {}
+        self._resource_version = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self.last_used = time.monotonic()
+
+    def start(self):
+        # the first list happens in the caller so api errors surface there; a
+        # failed start is retried by the next caller
+        with self._start_lock:
+            if self._thread is not None:
+                return self
+            self._relist()
+            self._thread = threading.Thread(
+                target=self._run, name=f"pod-cache-{self.namespace}", daemon=True
+            )
+            self._thread.start()
+            return self
+
+    def stop(self):
+        self._stopped.set()
+
+    def _relist(self):
+        pods, resource_version = {}, None
+        for page in list_pods_paged(self.v1, self.namespace, self.label_selector):
+            pods.update((p.metadata.name, p) for p in page.items)
+            resource_version = page.metadata.resource_version
+        index, keys = {}, {}
+        for name, pod in pods.items():
+            keys[name] = pod_keys(pod)
+            for key in keys[name]:
+                index.setdefault(key, set()).add(name)
+        with self._lock:
+            self._pods = pods
+            self._index = index
+            self._keys = keys
+            self._resource_version = resource_version
+        self._ready.set()
+
+    def _unindex(self, name):
+        for key in self._keys.pop(name, ()):
+            names = self._index.get(key)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._index[key]
+
+    def _apply(self, event_type, pod):
+        name = pod.metadata.name
+        with self._lock:
+            # labels and owners can change, so a modified pod is indexed afresh
+            self._unindex(name)
+            if event_type == "DELETED":
+                self._pods.pop(name, None)
+            else:
+                self._pods[name] = pod
+                self._keys[name] = pod_keys(pod)
+                for key in self._keys[name]:
+                    self._index.setdefault(key, set()).add(name)
+            self._resource_version = pod.metadata.resource_version
+
+    def _run(self):
+        backoff = 1
+        while not self._stopped.is_set():
+            # the read timeout only fires when the server holds the watch past its own timeout
+            kwargs = {"resource_version": self._resource_version, "timeout_seconds": self.watch_timeout,
+                      "_request_timeout": (K8S_REQUEST_TIMEOUT, self.watch_timeout + K8S_REQUEST_TIMEOUT)}
+            if self.label_selector:
+                kwargs["label_selector"] = self.label_selector
+            try:
+                w = watch.Watch()
+                for event in w.stream(self.v1.list_namespaced_pod, self.namespace, **kwargs):
+                    if self._stopped.is_set():
+                        w.stop()
+                        break
+                    if event["type"] == "ERROR":
+                        # resourceVersion too old, start over from a fresh list
+                        if event["raw_object"].get("code") == 410:
+                            self._relist()
+                            break
+                        continue
+                    self._apply(event["type"], event["object"])
+                backoff = 1
+            except ApiException as e:
+                if e.status == 410:
+                    self._relist_safely()
+                    continue
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            except Exception:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def _relist_safely(self):
+        try:
+            self._relist()
+        except Exception:
+            time.sleep(1)
+
+    def pods(self):
+        self._ready.wait()
+        with self._lock:
+            return list(self._pods.values())
+
+    def find(self, service: str):
+        # the pods a single-service lookup matches, sorted by name
+        self._ready.wait()
+        with self._lock:
+            return [self._pods[name] for name in sorted(self._index.get(service, ()))]
+
+    def get(self, name: str):
+        self._ready.wait()
+        with self._lock:
+            return self._pods.get(name)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def _evict(now, room=1):
+    # called with _caches_lock held: idle caches go first, then the least recently used
+    by_use = sorted(_caches.items(), key=lambda item: item[1].last_used)
+    for i, (key, cache) in enumerate(by_use):
+        if now - cache.last_used > POD_CACHE_IDLE or len(by_use) - i > POD_CACHE_MAX - room:
+            cache.stop()
+            del _caches[key]
+
+
+def get_pod_cache(v1, namespace="default"):
+    # one cache per (cluster client, namespace); the global lock is not held
+    # while listing so a slow cluster does not block the others
+    key = (id(v1.api_client), namespace)
+    now = time.monotonic()
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            _evict(now)
+            cache = _caches[key] = PodCache(v1, namespace)
+        cache.last_used = now
+    return cache.start()
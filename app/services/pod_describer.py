@@ -0,0 +1,176 @@
+import os
+import threading
+from datetime import datetime, timezone
+import yaml
+from kubernetes.client import ApiException
+from app.services import singleflight
+from app.utils.tracing import span
+
+# which sections each profile emits, smaller profiles mean smaller prompts
+PROFILES = {
+    "minimal": ("pod", "containers", "conditions"),
+    "standard": ("pod", "containers", "conditions", "resources", "probes", "events"),
+    "full": ("pod", "network", "labels", "annotations", "containers", "conditions", "resources", "probes", "events"),
+}
+DESCRIBE_PROFILE = os.getenv("DESCRIBE_PROFILE", "standard")
+DESCRIBE_EVENTS = int(os.getenv("DESCRIBE_EVENTS", 10))
+NOISY_ANNOTATION_PREFIXES = ("kubectl.kubernetes.io/", "deployment.kubernetes.io/")
+TOKEN_COUNT_CACHE_SIZE = 256
+
+_token_counts = {}
+_token_counts_lock = threading.Lock()
+
+
+def _age(timestamp):
+    if timestamp is None:
+        return None
+    seconds = int((datetime.now(timezone.utc) - timestamp).total_seconds())
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{seconds // size}{unit}"
+    return f"{seconds}s"
+
+
+def _state(state):
+    if state is None:
+        return None
+    if state.running:
+        return {"running": {"age": _age(state.running.started_at)}}
+    if state.waiting:
+        return {"waiting": {"reason": state.waiting.reason, "message": state.waiting.message}}
+    if state.terminated:
+        t = state.terminated
+        return {"terminated": {"reason": t.reason, "exit_code": t.exit_code, "age": _age(t.finished_at)}}
+    return None
+
+
+def _probe(probe):
+    if probe is None:
+        return None
+    if probe.http_get:
+        check = f"http {probe.http_get.path or '/'}:{probe.http_get.port}"
+    elif probe.tcp_socket:
+        check = f"tcp :{probe.tcp_socket.port}"
+    elif probe.grpc:
+        check = f"grpc :{probe.grpc.port}"
+    elif probe._exec:
+        check = "exec " + " ".join(probe._exec.command or [])
+    else:
+        check = "unknown"
+    return f"{check} every {probe.period_seconds or 10}s, fails after {probe.failure_threshold or 3}"
+
+
+def _compact(value):
+    # drop empty fields so they cost no tokens
+    if isinstance(value, dict):
+        value = {k: _compact(v) for k, v in value.items()}
+        return {k: v for k, v in value.items() if v not in (None, {}, [], "")}
+    if isinstance(value, list):
+        return [_compact(v) for v in value]
+    return value
+
+
+def pod_events(v1, pod, limit=DESCRIBE_EVENTS):
+    with span("k8s.list_namespaced_event", namespace=pod.metadata.namespace, pod=pod.metadata.name) as s:
+        events = singleflight.call(
+            v1, v1.list_namespaced_event, pod.metadata.namespace,
+            field_selector=f"involvedObject.name={pod.metadata.name}",
+        ).items
+        s.set(events=len(events))
+    # the response may be shared with other sessions, so it is not sorted in place
+    events = sorted(events, key=lambda e: e.last_timestamp or e.event_time or e.metadata.creation_timestamp)
+    return [
+        {"type": e.type, "reason": e.reason, "count": e.count, "age": _age(e.last_timestamp or e.event_time),
+         "message": e.message}
+        for e in events[-limit:]
+    ]
+
+
+def describe(pod, events=(), profile=DESCRIBE_PROFILE):
+    sections = PROFILES[profile]
+    statuses = {c.name: c for c in pod.status.container_statuses or []}
+    doc = {}
+
+    if "pod" in sections:
+        doc["pod"] = {
+            "name": pod.metadata.name,
+            "namespace": pod.metadata.namespace,
+            "node": pod.spec.node_name,
+            "phase": pod.status.phase,
+            "reason": pod.status.reason,
+            "age": _age(pod.metadata.creation_timestamp),
+        }
+    if "network" in sections:
+        doc["network"] = {"pod_ip": pod.status.pod_ip, "host_ip": pod.status.host_ip}
+    if "labels" in sections:
+        doc["labels"] = pod.metadata.labels
+    if "annotations" in sections:
+        doc["annotations"] = {
+            k: v for k, v in (pod.metadata.annotations or {}).items()
+            if not k.startswith(NOISY_ANNOTATION_PREFIXES)
+        }
+    if "conditions" in sections:
+        # only the interesting ones, a healthy pod has all conditions True
+        doc["conditions"] = [
+            {"type": c.type, "status": c.status, "reason": c.reason, "message": c.message}
+            for c in pod.status.conditions or [] if c.status != "True"
+        ]
+
+    containers = []
+    for container in pod.spec.containers:
+        status = statuses.get(container.name)
+        entry = {"name": container.name}
+        if "containers" in sections:
+            entry["image"] = container.image.rsplit("/", 1)[-1]
+            if status:
+                entry["ready"] = status.ready
+                entry["restarts"] = status.restart_count
+                entry["state"] = _state(status.state)
+                entry["last_state"] = _state(status.last_state)
+        if "resources" in sections and container.resources:
+            entry["requests"] = container.resources.requests
+            entry["limits"] = container.resources.limits
+        if "probes" in sections:
+            entry["liveness"] = _probe(container.liveness_probe)
+            entry["readiness"] = _probe(container.readiness_probe)
+            entry["startup"] = _probe(container.startup_probe)
+        containers.append(entry)
+    doc["containers"] = containers
+
+    if "events" in sections:
+        doc["events"] = list(events)
+    return _compact(doc)
+
+
+def to_text(doc):
+    return yaml.safe_dump(doc, sort_keys=False, width=120)
+
+
+def describe_pod_structured(v1, pod, profile=DESCRIBE_PROFILE):
+    events = []
+    if "events" in PROFILES[profile]:
+        try:
+            events = pod_events(v1, pod)
+        except ApiException:
+            # describing still works without permission to read events
+            pass
+    return to_text(describe(pod, events, profile))
+
+
+def _count_tokens(gclient, model: str, v1, pod, profile: str):
+    # measured by the model's tokenizer, once per pod version and profile
+    key = (pod.metadata.uid, pod.metadata.resource_version, profile, model)
+    with _token_counts_lock:
+        if key in _token_counts:
+            return _token_counts[key]
+    with span("gemini.count_tokens", model=model, profile=profile):
+        tokens = gclient.models.count_tokens(model=model, contents=describe_pod_structured(v1, pod, profile)).total_tokens
+    with _token_counts_lock:
+        _token_counts[key] = tokens
+        while len(_token_counts) > TOKEN_COUNT_CACHE_SIZE:
+            del _token_counts[next(iter(_token_counts))]
+    return tokens
+
+
+def profile_token_counts(gclient, model: str, v1, pod):
+    return {profile: _count_tokens(gclient, model, v1, pod, profile) for profile in PROFILES}
@@ -0,0 +1,84 @@
+import time
+from kubernetes.client import ApiException
+from app.services.pod_cache import get_pod_cache, list_pods
+
+
+def service_for_pod(pod, services):
+    # prefer the app label / owning deployment, fall back to the longest name prefix
+    labels = pod.metadata.labels or {}
+    if labels.get("app") in services:
+        return labels["app"]
+    for ref in pod.metadata.owner_references or []:
+        if ref.kind == "ReplicaSet":
+            deployment = ref.name.rsplit("-", 1)[0]
+            if deployment in services:
+                return deployment
+    best = None
+    for service in services:
+        if pod.metadata.name.startswith(service + "-") and (best is None or len(service) > len(best)):
+            best = service
+    return best
+
+
+def index_pods(pods, services):
+    services = set(services)
+    index = {service: [] for service in services}
+    for pod in pods:
+        service = service_for_pod(pod, services)
+        if service:
+            index[service].append(pod)
+    for replicas in index.values():
+        replicas.sort(key=lambda p: p.metadata.name)
+    return index
+
+
+def find_pods(v1, service: str, namespace="default", label_selector=None, field_selector=None):
+    # explicit selectors are resolved by the API server (paginated), everything
+    # else comes from the shared pod cache
+    if label_selector or field_selector:
+        return sorted(list_pods(v1, namespace, label_selector, field_selector), key=lambda p: p.metadata.name)
+    return get_pod_cache(v1, namespace).find(service)
+
+
+def pod_row(service: str, pod):
+    return {
+        "Service": service,
+        "Pod": pod.metadata.name,
+        "Status": pod.status.phase,
+        "Node": pod.spec.node_name,
+        "Restarts": sum([c.restart_count for c in pod.status.container_statuses or []]),
+    }
+
+
+def get_statuses(v1, services, namespace="default"):
+    start = time.perf_counter()
+    try:
+        pods = get_pod_cache(v1, namespace).pods()
+    except ApiException as e:
+        rows = [{"Service": s, "Pod": s, "Status": f"ERROR: {e.reason}", "Node": "-", "Restarts": "-"} for s in services]
+        return rows, {"list_ms": (time.perf_counter() - start) * 1000}
+    listed = time.perf_counter()
+
+    index = index_pods(pods, services)
+    indexed = time.perf_counter()
+
+    rows = []
+    for service in services:
+        if index[service]:
+            rows.extend(pod_row(service, pod) for pod in index[service])
+        else:
+            rows.append({"Service": service, "Pod": service, "Status": "NOT FOUND", "Node": "-", "Restarts": "-"})
+    done = time.perf_counter()
+
+    timings = {
+        "pods": len(pods),
+        "list_ms": (listed - start) * 1000,
+        "index_ms": (indexed - listed) * 1000,
+        "rows_ms": (done - indexed) * 1000,
+        "total_ms": (done - start) * 1000,
+    }
+    return rows, timings
+
+
+def format_timings(timings):
+    return " | ".join(f"{k}: {v:.1f}" if isinstance(v, float) else f"{k}: {v}" for k, v in timings.items())
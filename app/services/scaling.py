@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from kubernetes import watch
+from kubernetes.client import ApiException
+from app.utils.tracing import in_context, span
+
+ROLLOUT_TIMEOUT = float(os.getenv("ROLLOUT_TIMEOUT", 300))
+SCALE_WORKERS = int(os.getenv("SCALE_WORKERS", 8))
+
+_pool = ThreadPoolExecutor(max_workers=SCALE_WORKERS, thread_name_prefix="rollouts")
+
+
+def scale_items(intent):
+    # [(service, replicas)] from a multi-scale intent or the single service/replicas fields
+    items = [(s.get("service"), s.get("replicas")) for s in intent.get("scales") or []]
+    if not items and intent.get("service"):
+        items = [(intent.get("service"), intent.get("replicas"))]
+    return [(service, int(replicas)) for service, replicas in items if service and replicas is not None]
+
+
+class Rollout:
+    # patches one deployment's scale, then follows its status through a watch
+    # until the ready replicas match or the timeout expires
+    def __init__(self, service: str, replicas: int, namespace="default", timeout=ROLLOUT_TIMEOUT):
+        self.service = service
+        self.replicas = replicas
+        self.namespace = namespace
+        self.timeout = timeout
+        self.state = "pending"
+        self.ready = 0
+        self.updated = 0
+        self.message = ""
+        self.started = time.monotonic()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.state in ("ready", "timeout", "error")
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    def _finish(self, state: str, message=""):
+        with self._lock:
+            self.state = state
+            self.message = message
+            self.finished = time.monotonic()
+
+    def _update(self, deployment):
+        status = deployment.status
+        with self._lock:
+            self.ready = status.ready_replicas or 0
+            self.updated = status.updated_replicas or 0
+        return (
+            deployment.spec.replicas == self.replicas
+            and (status.observed_generation or 0) >= (deployment.metadata.generation or 0)
+            and self.ready == self.replicas
+            and (status.replicas or 0) == self.replicas
+        )
+
+    def run(self, apps_v1):
+        with span("k8s.rollout", service=self.service, namespace=self.namespace, replicas=self.replicas) as s:
+            self._run(apps_v1)
+            s.set(state=self.state, ready=self.ready)
+        return self
+
+    def _run(self, apps_v1):
+        try:
+            self.state = "patching"
+            with span("k8s.patch_namespaced_deployment_scale", service=self.service, namespace=self.namespace,
+                      replicas=self.replicas):
+                apps_v1.patch_namespaced_deployment_scale(
+                    name=self.service, namespace=self.namespace, body={"spec": {"replicas": self.replicas}}
+                )
+            self.state = "rolling out"
+            deadline = self.started + self.timeout
+            while time.monotonic() < deadline:
+                w = watch.Watch()
+                for event in w.stream(
+                    apps_v1.list_namespaced_deployment,
+                    self.namespace,
+                    field_selector=f"metadata.name={self.service}",
+                    timeout_seconds=max(1, int(deadline - time.monotonic())),
+                ):
+                    if event["type"] != "ERROR" and self._update(event["object"]):
+                        w.stop()
+                        self._finish("ready", f"Scaled {self.service} to {self.replicas} replicas.")
+                        return self
+            self._finish("timeout", f"{self.service}: {self.ready}/{self.replicas} ready after {self.timeout:.0f}s")
+        except ApiException as e:
+            self._finish("error", f"Error scaling {self.service}: {e.reason}")
+        except Exception as e:
+            self._finish("error", f"Error scaling {self.service}: {e}")
+        return self
+
+
+def scale_deployments(apps_v1, items, namespace="default", timeout=ROLLOUT_TIMEOUT):
+    # patches run concurrently and return at once; callers poll the Rollout objects
+    rollouts = [Rollout(service, replicas, namespace, timeout) for service, replicas in items]
+    for rollout in rollouts:
+        _pool.submit(in_context(rollout.run), apps_v1)
+    return rollouts
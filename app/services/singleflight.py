@@ -0,0 +1,90 @@
+import os
+import threading
+import time
+
+# identical reads issued at the same time by different sessions or threads share
+# one upstream call; the result is also reused for this many seconds afterwards
+SINGLEFLIGHT_TTL = float(os.getenv("SINGLEFLIGHT_TTL", 2))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished_at = None
+
+
+class Group:
+    def __init__(self, ttl=SINGLEFLIGHT_TTL):
+        self.ttl = ttl
+        self.calls = 0
+        self.shared = 0
+        self.fresh = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        # the first caller runs fn, callers arriving while it runs wait for it and
+        # callers within the freshness window reuse its result; errors are shared
+        # with the waiters but never kept
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.done.is_set() and time.monotonic() - call.finished_at >= self.ttl:
+                call = None
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                leader = True
+            else:
+                if call.done.is_set():
+                    self.fresh += 1
+                else:
+                    self.shared += 1
+                leader = False
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                call.finished_at = time.monotonic()
+                if call.error is not None or self.ttl <= 0:
+                    self._calls.pop(key, None)
+                self._prune(call.finished_at)
+            call.done.set()
+        return call.result
+
+    def _prune(self, now):
+        expired = [k for k, c in self._calls.items() if c.done.is_set() and now - c.finished_at >= self.ttl]
+        for k in expired:
+            del self._calls[k]
+
+    def stats(self):
+        requests = self.calls + self.shared + self.fresh
+        return {
+            "upstream_calls": self.calls,
+            "shared_in_flight": self.shared,
+            "fresh_hits": self.fresh,
+            "saved_rate": (self.shared + self.fresh) / requests if requests else 0.0,
+        }
+
+
+_group = Group()
+
+
+def call(v1, method, *args, **kwargs):
+    # v1.<method>(*args, **kwargs), keyed per cluster client, api method and arguments
+    key = (id(v1.api_client), method.__name__, args, tuple(sorted(kwargs.items())))
+    return _group.do(key, lambda: method(*args, **kwargs))
+
+
+def stats():
+    return _group.stats()
@@ -1,4 +1,5 @@
 import streamlit as st
+from app.services.multi_cluster import intent_target
 
 def initialize_session_state():
     for key, value in {
@@ -6,13 +7,27 @@ def initialize_session_state():
         "service": None,
         "logs": None,
         "response_json": None,
+        "live_logs": None,
+        "log_cursors": {},
+        "targets": None,
+        "target": None,
+        "rollouts": None,
+        "batch": None,
     }.items():
         if key not in st.session_state:
             st.session_state[key] = value
 
+def current_target():
+    # (context, namespace) the logs and scale views act on
+    return intent_target(st.session_state.target, st.session_state.response_json)
+
 def go_to_main():
     st.session_state.current_view = "main"
     st.session_state.service = None
     st.session_state.logs = None
     st.session_state.response_json = None
+    st.session_state.live_logs = None
+    st.session_state.log_cursors = {}
+    st.session_state.rollouts = None
+    st.session_state.batch = None
     st.rerun()
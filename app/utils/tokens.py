@@ -0,0 +1,6 @@
+# rough Gemini token estimate (~4 characters per token), good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str):
+    return len(text) // CHARS_PER_TOKEN + 1
@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from streamlit.runtime.scriptrunner_utils.exceptions import ScriptControlException
+
+# same switches as the microservices-demo services, plus a JSON-lines file
+# exporter for offline profiling; without the opentelemetry sdk every span is a no-op
+ENABLE_TRACING = os.getenv("ENABLE_TRACING", "") == "1"
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "otlp")
+COLLECTOR_SERVICE_ADDR = os.getenv("COLLECTOR_SERVICE_ADDR", "localhost:4317")
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+SERVICE_NAME = "gke-assistant"
+
+_tracer = None
+_otel_context = None
+_otel_trace = None
+
+
+class Span:
+    def __init__(self, span=None):
+        self._span = span
+
+    def set(self, **attributes):
+        # None values are dropped, anything that is not a primitive is stringified
+        if self._span is None:
+            return self
+        for key, value in attributes.items():
+            if value is None:
+                continue
+            if not isinstance(value, (str, bool, int, float)):
+                value = str(value)
+            self._span.set_attribute(key, value)
+        return self
+
+
+_NOOP = Span()
+
+
+def _json_lines_exporter(path: str):
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class JsonLinesExporter(SpanExporter):
+        def __init__(self):
+            self._lock = threading.Lock()
+
+        def export(self, spans):
+            with self._lock, open(path, "a") as f:
+                for span in spans:
+                    f.write(json.dumps(json.loads(span.to_json())) + "\n")
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            pass
+
+    return JsonLinesExporter()
+
+
+def _setup():
+    global _tracer, _otel_context, _otel_trace
+    try:
+        from opentelemetry import context, trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        logging.getLogger(__name__).warning(
+            "ENABLE_TRACING=1 but the opentelemetry sdk is not installed, tracing is off")
+        return
+    if TRACE_EXPORTER == "file":
+        exporter = _json_lines_exporter(TRACE_FILE)
+    else:
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter(endpoint=COLLECTOR_SERVICE_ADDR, insecure=True)
+    provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer(SERVICE_NAME)
+    _otel_context = context
+    _otel_trace = trace
+
+
+if ENABLE_TRACING:
+    _setup()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    if _tracer is None:
+        yield _NOOP
+        return
+    # st.rerun() and st.stop() end the script run by raising ScriptControlException,
+    # so only real exceptions mark the span as failed
+    with _tracer.start_as_current_span(name, record_exception=False, set_status_on_exception=False) as current:
+        try:
+            yield Span(current).set(**attributes)
+        except ScriptControlException:
+            raise
+        except Exception as e:
+            current.record_exception(e)
+            current.set_status(_otel_trace.Status(_otel_trace.StatusCode.ERROR, f"{type(e).__name__}: {e}"))
+            raise
+
+
+def in_context(fn):
+    # pool threads do not inherit the caller's span, this carries it over
+    if _tracer is None:
+        return fn
+    parent = _otel_context.get_current()
+
+    def run(*args, **kwargs):
+        token = _otel_context.attach(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _otel_context.detach(token)
+    return run
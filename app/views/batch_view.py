@@ -0,0 +1,54 @@
+import streamlit as st
+import pandas as pd
+from app.services import batch
+from app.services.gemini_calls import GEMINI_ERRORS
+from app.services.gemini_service import get_gemini_intents, show_gemini_error
+from app.services.k8s_service import describe_pod, get_logs, get_pod_status
+from app.services.multi_cluster import intent_target
+from app.utils.state import go_to_main
+
+
+def process_batch(text: str):
+    prompts = batch.parse_prompts(text)
+    if not prompts:
+        st.warning("No prompts found, put one prompt per line.")
+        return
+    # scaling changes the cluster, so a batch only reads
+    target = st.session_state.target
+    where = lambda i: dict(zip(("context", "namespace"), intent_target(target, i)))
+    handlers = {
+        "status": lambda i: batch.status_text(get_pod_status(i["service"], **where(i))),
+        "logs": lambda i: get_logs(i["service"], **where(i)),
+        "description": lambda i: describe_pod(i["service"], **where(i)),
+    }
+    with st.spinner(f"Running {len(prompts)} prompts..."):
+        try:
+            intents = get_gemini_intents(prompts)
+        except GEMINI_ERRORS as e:
+            show_gemini_error(e)
+            return
+        st.session_state.batch = batch.run(prompts, intents, handlers)
+    st.session_state.current_view = "batch_view"
+    st.rerun()
+
+
+def display_batch_form():
+    with st.expander("Batch prompts"):
+        with st.form("batch_form"):
+            uploaded = st.file_uploader("Prompt file, one prompt per line", type=["txt", "md"])
+            text = st.text_area("...or one prompt per line", height=160)
+            run_batch = st.form_submit_button("Run batch")
+        if run_batch:
+            process_batch(uploaded.getvalue().decode() if uploaded else text)
+
+
+def display_batch_view():
+    st.title("Batch report")
+    st.button("Back to Main", on_click=go_to_main)
+    rows = st.session_state.batch
+    st.caption(", ".join(f"{count} {status}" for status, count in batch.summary(rows).items()))
+    st.dataframe(pd.DataFrame(rows).drop(columns=["result"]), hide_index=True)
+    for row in rows:
+        with st.expander(f"{row['#']}. {row['prompt']} ({row['status']})"):
+            st.code(row["result"], language=None)
+    st.download_button("Download report (Markdown)", batch.report_markdown(rows), "batch_report.md", "text/markdown")
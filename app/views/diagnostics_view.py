@@ -0,0 +1,24 @@
+import streamlit as st
+from app.services import intent_classifier, intent_schema, singleflight
+from app.services.gemini_calls import call_stats, calls, export_json
+from app.services.gemini_scheduler import get_scheduler
+from app.services.intent_cache import get_intent_cache
+
+
+def display_diagnostics():
+    with st.sidebar.expander("Diagnostics"):
+        st.caption("Intent cache")
+        st.json(get_intent_cache().stats())
+        st.caption("Local intent classifier")
+        st.json(intent_classifier.stats())
+        st.caption("Gemini calls")
+        st.dataframe(call_stats())
+        with st.popover("Recent calls"):
+            st.dataframe(calls())
+        st.download_button("Export Gemini calls (JSON)", export_json(), "gemini_calls.json", "application/json")
+        st.caption("Intent parsing")
+        st.json(intent_schema.stats())
+        st.caption("Gemini scheduler")
+        st.json(get_scheduler().stats())
+        st.caption("Coalesced Kubernetes reads")
+        st.json(singleflight.stats())
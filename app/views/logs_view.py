@@ -1,20 +1,82 @@
 import streamlit as st
-from ..services.gemini_service import analyze_logs_with_gemini
-from ..utils.state import go_to_main
+from collections import deque
+from ..services.gemini_calls import GEMINI_ERRORS
+from ..services.gemini_service import analyze_logs_with_gemini, show_gemini_error
+from ..services.k8s_service import follow_logs
+from ..services.log_frame import aggregate, parse_json_logs, summarize_for_gemini
+from ..services.log_service import LOG_BUFFER_LINES
+from ..services.log_templates import mine_templates
+from ..services.multi_cluster import target_label
+from ..utils.state import current_target, go_to_main
 
 def display_logs_view():
     st.title(f"Logs for {st.session_state.service}")
     st.button("Back to Home (main Gemini Prompt)", on_click=go_to_main)
-    st.text_area(f"Logs for {st.session_state.service}", st.session_state.logs, height=200)
+    st.caption(f"Target: {target_label(current_target())}")
+
+    if st.toggle("Follow logs", key="follow_logs"):
+        display_live_logs()
+    else:
+        st.text_area(f"Logs for {st.session_state.service}", st.session_state.logs, height=200)
+
+    frame, total_lines = parse_json_logs(st.session_state.logs or "")
+    if not frame.empty:
+        aggregates = aggregate(frame)
+        with st.expander(f"Structured log summary ({len(frame)} of {total_lines} lines are JSON)"):
+            st.dataframe(aggregates["severity"])
+            st.line_chart(aggregates["per_minute"][["lines", "errors"]])
+            st.dataframe(aggregates["top_messages"])
+            if not aggregates["top_errors"].empty:
+                st.dataframe(aggregates["top_errors"])
+
+    templates = mine_templates(st.session_state.logs or "")
+    templates_text = templates.to_text()
+    if templates.templates:
+        with st.expander(f"Log templates ({len(templates.templates)} templates for {templates.lines} lines)"):
+            st.caption(f"Compression ratio: {templates.compression_ratio(templates_text):.1f}x")
+            st.dataframe(templates.rows())
+
+    contexts = {}
+    if not frame.empty:
+        contexts["JSON aggregates and a sample"] = lambda: summarize_for_gemini(frame, total_lines)
+    if templates.templates:
+        contexts["Log templates"] = lambda: templates_text
+    contexts["Raw logs"] = lambda: st.session_state.logs
 
     with st.form("followup_form"):
         followup_prompt = st.text_area("Ask a question about the logs...", height=120)
+        context = st.radio("Send to Gemini", list(contexts), horizontal=True)
         followup_submitted = st.form_submit_button("Analyze with Gemini")
 
     if followup_submitted and followup_prompt.strip():
-        with st.spinner("Analyzing..."):
-            response = analyze_logs_with_gemini(
-                st.session_state.logs, st.session_state.service, followup_prompt
-            )
+        logs = contexts[context]()
+        try:
+            with st.spinner("Analyzing..."):
+                response = analyze_logs_with_gemini(logs, st.session_state.service, followup_prompt)
             st.subheader("Gemini's Answer:")
-            st.markdown(response)
+            st.write_stream(response)
+        except GEMINI_ERRORS as e:
+            show_gemini_error(e)
+            return
+        st.caption(response.summary())
+
+
+@st.fragment(run_every=2)
+def display_live_logs():
+    context, namespace = current_target()
+    if st.session_state.live_logs is None:
+        st.session_state.live_logs = deque(maxlen=LOG_BUFFER_LINES)
+
+    streams = follow_logs(st.session_state.service, namespace, context)
+    for stream in streams:
+        lines, st.session_state.log_cursors[stream.pod] = stream.lines_since(
+            st.session_state.log_cursors.get(stream.pod, 0)
+        )
+        if len(streams) > 1:
+            lines = [f"[{stream.pod}] {line}" for line in lines]
+        st.session_state.live_logs.extend(lines)
+        if stream.error:
+            st.warning(f"{stream.pod}: {stream.error}")
+
+    st.session_state.logs = "\n".join(st.session_state.live_logs)
+    st.text_area(f"Logs for {st.session_state.service} (live)", st.session_state.logs, height=300)
@@ -1,7 +1,14 @@
 import streamlit as st
 import pandas as pd
-from app.services.k8s_service import get_pod_status
-from app.services.gemini_service import PODNAMES, get_gemini_intent
+from app.services.k8s_service import get_target_statuses, kube_contexts
+from app.services.pod_index import format_timings
+from app.services.gemini_calls import GEMINI_ERRORS
+from app.services.gemini_service import PODNAMES, get_gemini_intent, show_gemini_error
+from app.services.health_store import get_health_store
+from app.services.intent_classifier import fast_intent
+from app.services.multi_cluster import target_label
+from app.utils.state import current_target
+from app.views.batch_view import display_batch_form
 
 def color_status(val):
     return "color: green;" if val == "Running" else \
@@ -10,17 +17,22 @@ def color_status(val):
 
 def process_main_prompt(prompt):
     with st.spinner("Analyzing prompt with Gemini..."):
-        intent = get_gemini_intent(prompt)
+        try:
+            intent = fast_intent(prompt, PODNAMES) or get_gemini_intent(prompt)
+        except GEMINI_ERRORS as e:
+            show_gemini_error(e)
+            return
         if not intent:
             return
         st.session_state.response_json = intent
         action = intent.get("action")
         service = intent.get("service")
+        context, namespace = current_target()
 
         if action == "logs":
             from app.services.k8s_service import get_logs
             st.session_state.service = service
-            st.session_state.logs = get_logs(service, intent.get("namespace", "default"))
+            st.session_state.logs = get_logs(service, namespace, context=context)
             st.session_state.current_view = "logs_view"
         elif action == "scale":
             st.session_state.current_view = "scale_view"
@@ -30,12 +42,40 @@ def process_main_prompt(prompt):
             st.warning("Unknown action")
         st.rerun()
 
+def select_targets():
+    contexts, current = kube_contexts()
+    with st.expander("Clusters and namespaces"):
+        chosen = st.multiselect("Contexts", contexts, default=[current])
+        namespaces = st.text_input("Namespaces (comma separated)", "default")
+        namespaces = [n.strip() for n in namespaces.split(",") if n.strip()] or ["default"]
+        targets = [(None if c == current else c, n) for c in chosen or [current] for n in namespaces]
+        # logs and scaling act on one of them
+        if len(targets) > 1:
+            st.session_state.target = st.selectbox("Logs and scaling use", targets, format_func=target_label)
+        else:
+            st.session_state.target = targets[0]
+    return targets
+
 def display_main_view():
     st.title("Gemini Cluster Assistant for Kubernetes")
-    df = pd.DataFrame([get_pod_status(n, "default") for n in PODNAMES])
-    st.dataframe(df.style.map(color_status, subset=["Status"]))
+    st.session_state.targets = select_targets()
+    rows, timings = get_target_statuses(st.session_state.targets, PODNAMES)
+    df = pd.DataFrame(rows)
+    if len(st.session_state.targets) == 1:
+        df = df.drop(columns=["Context", "Namespace"])
+    st.dataframe(
+        df.style.map(color_status, subset=["Status"]),
+        column_config={"CPU trend": st.column_config.LineChartColumn("CPU trend (m)")},
+    )
+    st.caption(format_timings(timings))
+
+    with st.expander("Health history"):
+        hours = st.selectbox("Window (hours)", [1, 6, 24, 72])
+        st.dataframe(get_health_store().deltas(hours * 3600))
 
     with st.form("main_form"):
         prompt = st.text_area("Enter a prompt...", height=120)
         if st.form_submit_button("Send to Gemini") and prompt.strip():
             process_main_prompt(prompt)
+
+    display_batch_form()
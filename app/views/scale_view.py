@@ -1,18 +1,44 @@
 import streamlit as st
-from app.services.k8s_service import scale_deployment
-from app.utils.state import go_to_main
+from app.services.k8s_service import scale_deployments
+from app.services.multi_cluster import target_label
+from app.services.scaling import scale_items
+from app.utils.state import current_target, go_to_main
 
 def display_scale_view():
     st.title("Scaling Deployment")
     st.button("Back to Main", on_click=go_to_main)
     intent = st.session_state.response_json
-    service = intent.get("service")
-    replicas = intent.get("replicas")
-    namespace = intent.get("namespace", "default")
+    context, namespace = current_target()
+    items = scale_items(intent)
+    st.caption(f"Target: {target_label((context, namespace))}")
 
-    if service and replicas is not None:
-        msg = scale_deployment(service, replicas, namespace)
-        st.success(msg)
+    if items:
+        # patched once per prompt, reruns only poll the rollouts
+        if st.session_state.rollouts is None:
+            st.session_state.rollouts = scale_deployments(items, namespace, context)
+        if all(rollout.done for rollout in st.session_state.rollouts):
+            display_rollouts()
+        else:
+            follow_rollouts()
     else:
         st.warning("Could not determine service or replicas from the intent.")
-    st.json(intent)
\ No newline at end of file
+    st.json(intent)
+
+
+def display_rollouts():
+    for rollout in st.session_state.rollouts:
+        progress = min(rollout.ready / rollout.replicas, 1.0) if rollout.replicas else float(rollout.done)
+        st.progress(progress, text=f"{rollout.service}: {rollout.ready}/{rollout.replicas} ready "
+                                   f"({rollout.state}, {rollout.elapsed:.0f}s)")
+        if rollout.state == "ready":
+            st.success(rollout.message)
+        elif rollout.done:
+            st.error(rollout.message)
+
+
+@st.fragment(run_every=1)
+def follow_rollouts():
+    display_rollouts()
+    # one last full rerun, after it the finished rollouts render without the timer
+    if all(rollout.done for rollout in st.session_state.rollouts):
+        st.rerun()
\ No newline at end of file
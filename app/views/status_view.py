@@ -1,5 +1,7 @@
 import streamlit as st
-from app.services.k8s_service import get_pod_status
+import pandas as pd
+from app.services.k8s_service import get_target_statuses
+from app.services.pod_index import format_timings
 from app.utils.state import go_to_main
 
 
@@ -11,8 +13,14 @@ def display_status_view():
     namespace = intent.get("namespace", "default")
 
     if service:
-        status = get_pod_status(service, namespace)
-        st.json(status)
+        targets = st.session_state.targets or [(None, namespace)]
+        if namespace != "default":
+            targets = list(dict.fromkeys((context, namespace) for context, _ in targets))
+        rows, timings = get_target_statuses(targets, [service])
+        st.dataframe(
+            pd.DataFrame(rows), column_config={"CPU trend": st.column_config.LineChartColumn("CPU trend (m)")}
+        )
+        st.caption(format_timings(timings))
     else:
         st.warning("Could not determine service from the intent.")
     st.json(intent)
\ No newline at end of file
@@ -0,0 +1,490 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# the microservices-demo deployments, everything else is filler workloads
+SERVICES = [
+    "recommendationservice", "emailservice", "productcatalogservice",
+    "adservice", "shippingservice", "frontend",
+    "cartservice", "currencyservice", "paymentservice",
+    "checkoutservice",
+]
+PODS_PER_NODE = 30
+FILLER_REPLICAS = 50
+EVENT_LOG_SIZE = 10000
+MAX_WATCH_SECONDS = 600
+LOG_MESSAGES = [
+    '{{"timestamp": {ts:.3f}, "severity": "INFO", "name": "{svc}-server", "message": "[Recv ListRecommendations] product_ids=[\'OLJCESPC7Z\', \'66VCHSJNUP\', \'{n}\']"}}',
+    '{{"timestamp": {ts:.3f}, "severity": "INFO", "name": "{svc}-server", "message": "request complete in {n}ms"}}',
+    "GET /product/{n} HTTP/1.1 200 {n}ms",
+    '{{"timestamp": {ts:.3f}, "severity": "WARNING", "name": "{svc}-server", "message": "slow upstream response from cartservice: {n}ms"}}',
+    '{{"timestamp": {ts:.3f}, "severity": "ERROR", "name": "{svc}-server", "message": "failed to connect to redis-cart:6379, attempt {n}"}}',
+]
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _stamp(when):
+    return when.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _nano_stamp(when):
+    return when.strftime("%Y-%m-%dT%H:%M:%S.%f") + "000Z"
+
+
+def _field(obj, path: str):
+    for part in path.split("."):
+        obj = obj.get(part) if isinstance(obj, dict) else None
+    return "" if obj is None else str(obj)
+
+
+def label_matcher(selector):
+    # equality, inequality, existence and set based requirements
+    if not selector:
+        return lambda labels: True
+    requirements = []
+    for term in re.findall(r"[^,(]+(?:\([^)]*\))?", selector):
+        term = term.strip()
+        match = re.match(r"^(\S+)\s+(in|notin)\s+\((.*)\)$", term)
+        if match:
+            key, op, values = match.group(1), match.group(2), {v.strip() for v in match.group(3).split(",")}
+            requirements.append(lambda l, k=key, o=op, v=values: (l.get(k) in v) == (o == "in"))
+        elif "!=" in term:
+            key, value = term.split("!=", 1)
+            requirements.append(lambda l, k=key.strip(), v=value.strip(): l.get(k) != v)
+        elif "=" in term:
+            key, value = term.replace("==", "=").split("=", 1)
+            requirements.append(lambda l, k=key.strip(), v=value.strip(): l.get(k) == v)
+        elif term.startswith("!"):
+            requirements.append(lambda l, k=term[1:].strip(): k not in l)
+        elif term:
+            requirements.append(lambda l, k=term: k in l)
+    return lambda labels: all(r(labels or {}) for r in requirements)
+
+
+def field_matcher(selector):
+    if not selector:
+        return lambda obj: True
+    requirements = []
+    for term in selector.split(","):
+        if "!=" in term:
+            path, value = term.split("!=", 1)
+            requirements.append(lambda o, p=path, v=value: _field(o, p) != v)
+        elif "=" in term:
+            path, value = term.replace("==", "=").split("=", 1)
+            requirements.append(lambda o, p=path, v=value: _field(o, p) == v)
+    return lambda obj: all(r(obj) for r in requirements)
+
+
+class FakeCluster:
+    # synthetic pods, deployments, events, logs and metrics with a shared
+    # resourceVersion counter and an event log that watches are served from
+    def __init__(self, pods=1000, replicas=3, namespace="default", rollout_seconds=0.5, seed=0):
+        self.namespace = namespace
+        self.rollout_seconds = rollout_seconds
+        self.rv = 1
+        self.pods = {}
+        self.deployments = {}
+        self.events = {}
+        self.log = deque(maxlen=EVENT_LOG_SIZE)
+        self.changed = threading.Condition()
+        self._random = random.Random(seed)
+        self._started = _now() - timedelta(days=2)
+
+        workloads = [(s, replicas) for s in SERVICES]
+        remaining = max(0, pods - replicas * len(SERVICES))
+        for i in range(0, remaining, FILLER_REPLICAS):
+            workloads.append((f"workload-{i // FILLER_REPLICAS}", min(FILLER_REPLICAS, remaining - i)))
+        self.nodes = [f"gke-pool-{i}" for i in range(max(1, pods // PODS_PER_NODE))]
+        for name, count in workloads:
+            self.deployments[name] = self._deployment(name, count)
+            for _ in range(count):
+                self._add_pod(name)
+
+    def _next_rv(self):
+        self.rv += 1
+        return str(self.rv)
+
+    def _emit(self, kind: str, event_type: str, obj):
+        # callers hold self.changed
+        self.log.append((self.rv, kind, event_type, obj))
+        self.changed.notify_all()
+
+    def _deployment(self, name: str, replicas: int):
+        labels = {"app": name}
+        container = {"name": "server", "image": f"gcr.io/google-samples/microservices-demo/{name}:v0.10.0"}
+        return {
+            "apiVersion": "apps/v1", "kind": "Deployment",
+            "metadata": {"name": name, "namespace": self.namespace, "labels": labels, "generation": 1,
+                         "resourceVersion": self._next_rv(), "uid": f"uid-deploy-{name}",
+                         "creationTimestamp": _stamp(self._started)},
+            "spec": {"replicas": replicas, "selector": {"matchLabels": labels},
+                     "template": {"metadata": {"labels": labels}, "spec": {"containers": [container]}}},
+            "status": {"replicas": replicas, "readyReplicas": replicas, "updatedReplicas": replicas,
+                       "availableReplicas": replicas, "observedGeneration": 1},
+        }
+
+    def _add_pod(self, service: str):
+        suffix = "".join(self._random.choices("bcdfghjklmnpqrstvwxz2456789", k=5))
+        replica_set = f"{service}-{zlib.crc32(service.encode()):08x}"
+        name = f"{replica_set}-{suffix}"
+        restarts = self._random.choice([0] * 8 + [1, 4])
+        phase = self._random.choice(["Running"] * 48 + ["Pending", "Failed"])
+        started = _stamp(self._started + timedelta(minutes=self._random.randint(0, 2000)))
+        probe = {"httpGet": {"path": "/_healthz", "port": 8080}, "periodSeconds": 10, "failureThreshold": 3}
+        pod = {
+            "apiVersion": "v1", "kind": "Pod",
+            "metadata": {
+                "name": name, "namespace": self.namespace, "uid": f"uid-{name}",
+                "labels": {"app": service, "pod-template-hash": replica_set.rsplit("-", 1)[-1]},
+                "ownerReferences": [{"apiVersion": "apps/v1", "kind": "ReplicaSet", "name": replica_set,
+                                     "uid": f"uid-{replica_set}", "controller": True}],
+                "resourceVersion": self._next_rv(), "creationTimestamp": started,
+            },
+            "spec": {
+                "nodeName": self._random.choice(self.nodes),
+                "containers": [{
+                    "name": "server",
+                    "image": f"gcr.io/google-samples/microservices-demo/{service}:v0.10.0",
+                    "resources": {"requests": {"cpu": "100m", "memory": "64Mi"},
+                                  "limits": {"cpu": "200m", "memory": "128Mi"}},
+                    "livenessProbe": probe, "readinessProbe": probe,
+                }],
+            },
+            "status": {
+                "phase": phase, "podIP": f"10.8.{self._random.randint(0, 255)}.{self._random.randint(1, 254)}",
+                "hostIP": f"10.128.0.{self._random.randint(1, 254)}",
+                "conditions": [{"type": "Ready", "status": "True" if phase == "Running" else "False"}],
+                "containerStatuses": [{
+                    "name": "server", "ready": phase == "Running", "restartCount": restarts,
+                    "image": f"{service}:v0.10.0", "imageID": f"sha256:{service}",
+                    "state": {"running": {"startedAt": started}} if phase == "Running"
+                    else {"waiting": {"reason": "CrashLoopBackOff" if phase == "Failed" else "ContainerCreating"}},
+                }],
+            },
+        }
+        self.pods[name] = pod
+        return pod
+
+    def pod_events(self, pod_name: str):
+        if pod_name not in self.events:
+            now = _now()
+            self.events[pod_name] = [
+                {"metadata": {"name": f"{pod_name}.{i}", "namespace": self.namespace,
+                              "creationTimestamp": _stamp(now - timedelta(minutes=30 - i))},
+                 "involvedObject": {"kind": "Pod", "name": pod_name, "namespace": self.namespace},
+                 "type": kind, "reason": reason, "message": message, "count": count,
+                 "firstTimestamp": _stamp(now - timedelta(minutes=30 - i)),
+                 "lastTimestamp": _stamp(now - timedelta(minutes=10 - i))}
+                for i, (kind, reason, message, count) in enumerate([
+                    ("Normal", "Scheduled", f"Successfully assigned {self.namespace}/{pod_name}", 1),
+                    ("Normal", "Pulled", "Container image already present on machine", 1),
+                    ("Warning", "Unhealthy", "Readiness probe failed: HTTP probe failed with statuscode: 503", 3),
+                ])
+            ]
+        return self.events[pod_name]
+
+    def log_lines(self, pod_name: str, tail_lines=100, timestamps=False, now=None):
+        rng = random.Random(pod_name)
+        service = self.pods[pod_name]["metadata"]["labels"]["app"] if pod_name in self.pods else pod_name
+        now = now or _now()
+        lines = []
+        for i in range(tail_lines, 0, -1):
+            when = now - timedelta(seconds=i)
+            message = rng.choice(LOG_MESSAGES).format(ts=when.timestamp(), svc=service, n=rng.randint(1, 999))
+            lines.append(f"{_nano_stamp(when)} {message}" if timestamps else message)
+        return lines
+
+    def scale(self, name: str, replicas: int):
+        with self.changed:
+            deployment = self.deployments.get(name)
+            if deployment is None:
+                return None
+            deployment["spec"]["replicas"] = replicas
+            deployment["metadata"]["generation"] += 1
+            deployment["metadata"]["resourceVersion"] = self._next_rv()
+            self._emit("Deployment", "MODIFIED", deployment)
+        threading.Timer(self.rollout_seconds, self._roll_out, (name,)).start()
+        return deployment
+
+    def _roll_out(self, name: str):
+        with self.changed:
+            deployment = self.deployments[name]
+            replicas = deployment["spec"]["replicas"]
+            pods = [p for p in self.pods.values() if p["metadata"]["labels"]["app"] == name]
+            for pod in pods[replicas:]:
+                del self.pods[pod["metadata"]["name"]]
+                pod["metadata"]["resourceVersion"] = self._next_rv()
+                self._emit("Pod", "DELETED", pod)
+            for _ in range(replicas - len(pods)):
+                pod = self._add_pod(name)
+                self._emit("Pod", "ADDED", pod)
+            deployment["status"].update(replicas=replicas, readyReplicas=replicas, updatedReplicas=replicas,
+                                        availableReplicas=replicas,
+                                        observedGeneration=deployment["metadata"]["generation"])
+            deployment["metadata"]["resourceVersion"] = self._next_rv()
+            self._emit("Deployment", "MODIFIED", deployment)
+
+    def pod_metrics(self):
+        stamp = _stamp(_now())
+        return {"kind": "PodMetricsList", "apiVersion": "metrics.k8s.io/v1beta1", "metadata": {}, "items": [
+            {"metadata": {"name": name, "namespace": self.namespace}, "timestamp": stamp, "window": "15s",
+             "containers": [{"name": "server", "usage": {"cpu": f"{self._random.randint(1, 200)}m",
+                                                         "memory": f"{self._random.randint(32, 128)}Mi"}}]}
+            for name in self.pods
+        ]}
+
+    def node_metrics(self):
+        stamp = _stamp(_now())
+        return {"kind": "NodeMetricsList", "apiVersion": "metrics.k8s.io/v1beta1", "metadata": {}, "items": [
+            {"metadata": {"name": node}, "timestamp": stamp, "window": "15s",
+             "usage": {"cpu": f"{self._random.randint(100, 3000)}m", "memory": f"{self._random.randint(1, 12)}Gi"}}
+            for node in self.nodes
+        ]}
+
+
+def _flag(params, name: str):
+    # the python client sends booleans as "True"
+    return params.get(name, "").lower() in ("true", "1")
+
+
+def _status(code: int, reason: str, message: str):
+    return {"kind": "Status", "apiVersion": "v1", "metadata": {}, "status": "Failure",
+            "message": message, "reason": reason, "code": code}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are separate writes, without this delayed ACKs add ~40ms per request
+    disable_nagle_algorithm = True
+    cluster: FakeCluster = None
+    latency_ms = 0.0
+    jitter_ms = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _delay(self):
+        # a fixed part plus an exponential tail
+        delay = self.latency_ms + (random.expovariate(1 / self.jitter_ms) if self.jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000)
+
+    def _send(self, code: int, body, content_type="application/json"):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_chunked(self, content_type="application/json"):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = url.path.strip("/").split("/")
+        watching = _flag(params, "watch")
+        try:
+            if not watching:
+                self._delay()
+            self._route_get(parts, params, watching)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _route_get(self, parts, params, watching):
+        cluster = self.cluster
+        # /api/v1/namespaces/{ns}/pods[/{name}[/log]]
+        if parts[:3] == ["api", "v1", "namespaces"] and len(parts) >= 5 and parts[4] == "pods":
+            if len(parts) == 5:
+                return self._list("Pod", "PodList", "v1", lambda: cluster.pods.values(), params, watching)
+            pod = cluster.pods.get(parts[5])
+            if pod is None:
+                return self._send(404, _status(404, "NotFound", f'pods "{parts[5]}" not found'))
+            if len(parts) == 6:
+                return self._send(200, pod)
+            if parts[6] == "log":
+                return self._logs(parts[5], params)
+        if parts[:3] == ["api", "v1", "namespaces"] and len(parts) == 5 and parts[4] == "events":
+            name = re.search(r"involvedObject\.name=([^,]+)", params.get("fieldSelector", ""))
+            items = cluster.pod_events(name.group(1)) if name and name.group(1) in cluster.pods else []
+            return self._send(200, {"kind": "EventList", "apiVersion": "v1",
+                                    "metadata": {"resourceVersion": str(cluster.rv)}, "items": items})
+        if parts[:4] == ["apis", "apps", "v1", "namespaces"] and len(parts) >= 6 and parts[5] == "deployments":
+            if len(parts) == 6:
+                return self._list("Deployment", "DeploymentList", "apps/v1",
+                                  lambda: cluster.deployments.values(), params, watching)
+            deployment = cluster.deployments.get(parts[6])
+            if deployment is None:
+                return self._send(404, _status(404, "NotFound", f'deployments.apps "{parts[6]}" not found'))
+            return self._send(200, deployment)
+        if parts[:3] == ["apis", "metrics.k8s.io", "v1beta1"]:
+            if parts[-1] == "pods":
+                return self._send(200, cluster.pod_metrics())
+            if parts[-1] == "nodes":
+                return self._send(200, cluster.node_metrics())
+        self._send(404, _status(404, "NotFound", f"{self.path} not found"))
+
+    def _list(self, kind, list_kind, api_version, objects, params, watching):
+        labels = label_matcher(params.get("labelSelector"))
+        fields = field_matcher(params.get("fieldSelector"))
+        matches = lambda obj: labels(obj["metadata"].get("labels")) and fields(obj)
+        if watching:
+            return self._watch(kind, objects, matches, params)
+        offset = int(params.get("continue") or 0)
+        limit = int(params.get("limit") or 0)
+        # serialized under the lock, rollouts mutate the objects
+        with self.cluster.changed:
+            items = [obj for obj in objects() if matches(obj)]
+            page = items[offset: offset + limit] if limit else items[offset:]
+            next_offset = offset + len(page)
+            metadata = {"resourceVersion": str(self.cluster.rv)}
+            if limit and next_offset < len(items):
+                metadata["continue"] = str(next_offset)
+                metadata["remainingItemCount"] = len(items) - next_offset
+            body = json.dumps({"kind": list_kind, "apiVersion": api_version, "metadata": metadata, "items": page})
+        self._send(200, body.encode())
+
+    def _watch(self, kind, objects, matches, params):
+        # held open until timeoutSeconds like the real api server, streaming
+        # the changes after resourceVersion (or the current state without one)
+        cluster = self.cluster
+        deadline = time.monotonic() + min(int(params.get("timeoutSeconds") or MAX_WATCH_SECONDS), MAX_WATCH_SECONDS)
+        self._start_chunked()
+        since = params.get("resourceVersion")
+        event = lambda event_type, obj: json.dumps({"type": event_type, "object": obj}).encode() + b"\n"
+        with cluster.changed:
+            if since in (None, "", "0"):
+                pending = [event("ADDED", obj) for obj in objects() if matches(obj)]
+                last = cluster.rv
+            elif cluster.log and cluster.log[0][0] > int(since) + 1:
+                # the changes after since were dropped from the event log
+                pending = [event("ERROR", _status(410, "Expired", f"too old resource version: {since}"))]
+                last = None
+            else:
+                pending, last = [], int(since)
+        while True:
+            for data in pending:
+                self._chunk(data)
+            if last is None:
+                break
+            with cluster.changed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if cluster.rv <= last:
+                    cluster.changed.wait(remaining)
+                pending = [event(t, obj) for rv, k, t, obj in cluster.log if rv > last and k == kind and matches(obj)]
+                last = cluster.rv
+        self._end_chunked()
+
+    def _logs(self, pod_name, params):
+        timestamps = _flag(params, "timestamps")
+        lines = self.cluster.log_lines(pod_name, int(params.get("tailLines") or 100), timestamps)
+        if not _flag(params, "follow"):
+            return self._send(200, ("\n".join(lines) + "\n").encode(), "text/plain")
+        self._start_chunked("text/plain")
+        self._chunk(("\n".join(lines) + "\n").encode())
+        deadline = time.monotonic() + MAX_WATCH_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(1)
+            self._chunk((self.cluster.log_lines(pod_name, 1, timestamps)[0] + "\n").encode())
+        self._end_chunked()
+
+    def do_PATCH(self):
+        self._delay()
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        # /apis/apps/v1/namespaces/{ns}/deployments/{name}/scale
+        if parts[:4] == ["apis", "apps", "v1", "namespaces"] and len(parts) == 8 and parts[7] == "scale":
+            replicas = body.get("spec", {}).get("replicas") if isinstance(body, dict) else None
+            if not isinstance(replicas, int):
+                return self._send(422, _status(422, "Invalid", "spec.replicas must be an integer"))
+            deployment = self.cluster.scale(parts[6], replicas)
+            if deployment is None:
+                return self._send(404, _status(404, "NotFound", f'deployments.apps "{parts[6]}" not found'))
+            return self._send(200, {
+                "kind": "Scale", "apiVersion": "autoscaling/v1",
+                "metadata": {"name": parts[6], "namespace": parts[4],
+                             "resourceVersion": deployment["metadata"]["resourceVersion"]},
+                "spec": {"replicas": replicas},
+                "status": {"replicas": deployment["status"]["replicas"], "selector": f"app={parts[6]}"},
+            })
+        self._send(404, _status(404, "NotFound", f"{self.path} not found"))
+
+
+class FakeApiServer:
+    def __init__(self, cluster: FakeCluster, host="127.0.0.1", port=0, latency_ms=0.0, jitter_ms=0.0):
+        handler = type("BoundHandler", (Handler,), {"cluster": cluster, "latency_ms": latency_ms,
+                                                    "jitter_ms": jitter_ms})
+        self.cluster = cluster
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-apiserver", daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+
+    def kubeconfig(self, namespace="default"):
+        return {
+            "apiVersion": "v1", "kind": "Config", "current-context": "fake",
+            "clusters": [{"name": "fake", "cluster": {"server": self.url}}],
+            "users": [{"name": "fake", "user": {"token": "fake"}}],
+            "contexts": [{"name": "fake", "context": {"cluster": "fake", "user": "fake", "namespace": namespace}}],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic cluster on a local fake Kubernetes API server")
+    parser.add_argument("--pods", type=int, default=1000)
+    parser.add_argument("--replicas", type=int, default=3, help="pods per microservices-demo deployment")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="mean of the exponential latency tail")
+    parser.add_argument("--rollout-seconds", type=float, default=0.5)
+    parser.add_argument("--kubeconfig", help="write a kubeconfig pointing at the server to this path")
+    args = parser.parse_args()
+
+    cluster = FakeCluster(args.pods, args.replicas, rollout_seconds=args.rollout_seconds)
+    server = FakeApiServer(cluster, port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    if args.kubeconfig:
+        with open(args.kubeconfig, "w") as f:
+            json.dump(server.kubeconfig(), f)
+    print(f"Serving {len(cluster.pods)} pods on {len(cluster.nodes)} nodes at {server.url}")
+    server.httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from bench.fake_apiserver import SERVICES, FakeApiServer, FakeCluster
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def measure(fn, iterations: int, memory_iterations=3):
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        latencies.append((time.perf_counter() - start) * 1000)
+    # traced separately, tracemalloc slows everything it watches
+    gc.collect()
+    tracemalloc.start()
+    for i in range(memory_iterations):
+        fn(i)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 0.5), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "peak_kib": round(peak / 1024),
+    }
+
+
+def run(args):
+    cluster = FakeCluster(args.pods, args.replicas, rollout_seconds=args.rollout_seconds)
+    server = FakeApiServer(cluster, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms).start()
+    workdir = tempfile.mkdtemp(prefix="k8s-bench-")
+    kubeconfig = os.path.join(workdir, "kubeconfig")
+    with open(kubeconfig, "w") as f:
+        json.dump(server.kubeconfig(), f)
+    # k8s_service loads the kubeconfig on import
+    os.environ["KUBECONFIG"] = kubeconfig
+    from app.services import k8s_service, pod_cache
+
+    services = SERVICES
+    service = lambda i: services[i % len(services)]
+    results = {}
+
+    # the first call lists every pod into the shared cache, measured on its own;
+    # the memory of holding every pod comes from a second, traced list
+    start = time.perf_counter()
+    pod_cache.get_pod_cache(k8s_service.v1, "default")
+    warmup_ms = (time.perf_counter() - start) * 1000
+    gc.collect()
+    tracemalloc.start()
+    pods = list(pod_cache.list_pods(k8s_service.v1, "default"))
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del pods
+    results["pod_cache_warmup"] = {"iterations": 1, "p50_ms": round(warmup_ms, 2), "p99_ms": round(warmup_ms, 2),
+                                   "mean_ms": round(warmup_ms, 2), "peak_kib": round(peak / 1024),
+                                   "retained_kib": round(retained / 1024)}
+
+    cases = {
+        "get_pod_status": lambda i: k8s_service.get_pod_status(service(i)),
+        "get_pod_status[label_selector]": lambda i: k8s_service.get_pod_status(
+            service(i), label_selector=f"app={service(i)}"),
+        "get_logs": lambda i: k8s_service.get_logs(service(i)),
+        "describe_pod": lambda i: k8s_service.describe_pod(service(i)),
+        "scale_deployment": lambda i: k8s_service.scale_deployment(service(i), args.replicas + i % 2),
+        "get_statuses": lambda i: k8s_service.get_statuses(services),
+        "dashboard": lambda i: k8s_service.get_target_statuses([(None, "default")], services),
+    }
+    for name, fn in cases.items():
+        if args.only and name not in args.only:
+            continue
+        results[name] = measure(fn, args.iterations)
+        print(f"{name:32} {results[name]}", file=sys.stderr)
+
+    # a whole rollout, patch until the watch reports every replica ready
+    def rollout(i):
+        rollouts = k8s_service.scale_deployments([(service(i), args.replicas + 1 - i % 2)])
+        while not all(r.done for r in rollouts):
+            time.sleep(0.01)
+    if not args.only or "rollout" in args.only:
+        results["rollout"] = measure(rollout, max(1, args.iterations // 10), memory_iterations=1)
+
+    server.stop()
+    return {
+        "config": {"pods": len(cluster.pods), "nodes": len(cluster.nodes), "latency_ms": args.latency_ms,
+                   "jitter_ms": args.jitter_ms, "iterations": args.iterations},
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance: float):
+    # p99 regressions beyond the tolerance, as (case, baseline ms, current ms)
+    regressions = []
+    for name, result in report["results"].items():
+        before = baseline["results"].get(name)
+        if before and result["p99_ms"] > before["p99_ms"] * (1 + tolerance):
+            regressions.append((name, before["p99_ms"], result["p99_ms"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Kubernetes paths against a fake API server")
+    parser.add_argument("--pods", type=int, default=10000)
+    parser.add_argument("--replicas", type=int, default=3, help="pods per microservices-demo deployment")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--jitter-ms", type=float, default=2.0, help="mean of the exponential latency tail")
+    parser.add_argument("--rollout-seconds", type=float, default=0.2)
+    parser.add_argument("--only", nargs="*", help="run only these cases")
+    parser.add_argument("--output", help="write the report as JSON to this path")
+    parser.add_argument("--baseline", help="a previous --output report to compare p99 latencies against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p99 growth over the baseline")
+    args = parser.parse_args()
+
+    report = run(args)
+    print(f"{'case':32} {'p50 ms':>10} {'p99 ms':>10} {'peak KiB':>10}")
+    for name, result in report["results"].items():
+        print(f"{name:32} {result['p50_ms']:>10} {result['p99_ms']:>10} {result['peak_kib']:>10}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: p99 {before} ms -> {after} ms")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import yaml
+from bench.fake_apiserver import FakeApiServer, FakeCluster
+from bench.k8s_bench import compare, percentile
+
+# prompt -> the view it should land on, and an optional follow-up question
+FLOWS = {
+    "status": ("what is the status of cartservice", "status_view", None),
+    "logs": ("show me the logs of frontend", "logs_view", "why are there errors?"),
+    "describe": ("describe the paymentservice pod", "description_view", None),
+    "scale": ("scale adservice to 4 replicas", "scale_view", None),
+    "help": ("help", "help_view", None),
+    "irrelevant": ("what is the weather like in paris today", "irrelevant_view", None),
+}
+
+
+def _button(at, label: str):
+    return next(b for b in at.button if b.label == label)
+
+
+def run_flow(name: str, secrets, timeout: float):
+    from streamlit.testing.v1 import AppTest
+
+    prompt, view, followup = FLOWS[name]
+    timings = {}
+    # a fresh AppTest is a fresh session, like a new browser tab
+    at = AppTest.from_file("main.py", default_timeout=timeout)
+    for key, value in secrets.items():
+        at.secrets[key] = value
+    start = time.perf_counter()
+    at.run()
+    timings["main_view_ms"] = (time.perf_counter() - start) * 1000
+
+    at.text_area[0].input(prompt)
+    start = time.perf_counter()
+    _button(at, "Send to Gemini").click().run()
+    timings["prompt_ms"] = (time.perf_counter() - start) * 1000
+    error = [e.value for e in at.exception] or None
+    if not error and at.session_state.current_view != view:
+        error = f"landed on {at.session_state.current_view}, expected {view}"
+
+    if followup and not error:
+        at.text_area[-1].input(followup)
+        start = time.perf_counter()
+        _button(at, "Analyze with Gemini").click().run()
+        timings["followup_ms"] = (time.perf_counter() - start) * 1000
+        error = [e.value for e in at.exception] or None
+    timings["total_ms"] = sum(timings.values())
+    return name, timings, error
+
+
+def run_session(flows, secrets, timeout: float):
+    # AppTest is not thread safe, so concurrent sessions are separate processes,
+    # each warmed up once like a freshly started app replica
+    from app.services import intent_schema
+
+    run_flow(flows[0], secrets, timeout)
+    before = intent_schema.stats()
+    outcomes = []
+    start = time.perf_counter()
+    for name in flows:
+        try:
+            outcomes.append(run_flow(name, secrets, timeout))
+        except Exception as e:
+            outcomes.append((name, {}, str(e)))
+    elapsed = time.perf_counter() - start
+    after = intent_schema.stats()
+    intents = {key: after[key] - before[key] for key in ("requests", "first_try", "repaired", "failed")}
+    return outcomes, elapsed, intents
+
+
+def summarize(values):
+    return {"p50_ms": round(percentile(values, 0.5), 1), "p99_ms": round(percentile(values, 0.99), 1),
+            "mean_ms": round(statistics.fmean(values), 1)}
+
+
+def run(args):
+    # environment first, the app reads its knobs when its modules are imported
+    workdir = tempfile.mkdtemp(prefix="prompt-bench-")
+    os.environ.update({
+        "MODEL_BACKEND": "fake",
+        "FAKE_GEMINI_LATENCY_MS": str(args.latency_ms),
+        "FAKE_GEMINI_LATENCY_SIGMA": str(args.latency_sigma),
+        "FAKE_GEMINI_TOKENS_PER_SECOND": str(args.tokens_per_second),
+        "FAKE_GEMINI_ERROR_RATE": str(args.error_rate),
+        "FAKE_GEMINI_MALFORMED_RATE": str(args.malformed_rate),
+        "INTENT_STRUCTURED_OUTPUT": "1" if args.structured_output else "0",
+        "HEALTH_DB": os.path.join(workdir, "pod_health.db"),
+        "HEALTH_SAMPLE_INTERVAL": "3600",
+    })
+    if not args.fast_path:
+        os.environ["FAST_PATH_CONFIDENCE"] = "2"
+    if not args.intent_cache:
+        os.environ["INTENT_CACHE_SIZE"] = "0"
+
+    cluster = FakeCluster(args.pods, rollout_seconds=0.2)
+    server = FakeApiServer(cluster, latency_ms=args.k8s_latency_ms).start()
+    secrets = {"API_KEY": "fake", "KUBECONFIG": yaml.safe_dump(server.kubeconfig())}
+    flows = [name for name in FLOWS if not args.only or name in args.only]
+    work = [flow for _ in range(args.iterations) for flow in flows]
+    sessions = [work[i::args.sessions] for i in range(args.sessions)]
+
+    results, errors, wall = {}, [], 0.0
+    intents = {"requests": 0, "first_try": 0, "repaired": 0, "failed": 0}
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.sessions, mp_context=context) as pool:
+        futures = [pool.submit(run_session, session, secrets, args.timeout) for session in sessions if session]
+        for future in futures:
+            outcomes, elapsed, session_intents = future.result()
+            for key, value in session_intents.items():
+                intents[key] += value
+            # sessions run side by side, the slowest one bounds the throughput
+            wall = max(wall, elapsed)
+            for name, timings, error in outcomes:
+                if error:
+                    errors.append((name, error))
+                for key, value in timings.items():
+                    results.setdefault(name, {}).setdefault(key, []).append(value)
+    server.stop()
+
+    return {
+        "config": {"pods": len(cluster.pods), "sessions": args.sessions, "iterations": args.iterations,
+                   "latency_ms": args.latency_ms, "latency_sigma": args.latency_sigma,
+                   "tokens_per_second": args.tokens_per_second, "error_rate": args.error_rate,
+                   "malformed_rate": args.malformed_rate, "fast_path": args.fast_path,
+                   "structured_output": args.structured_output, "intent_cache": args.intent_cache},
+        "throughput_flows_per_s": round(len(work) / wall, 2),
+        "intents": {**intents, "parse_failure_rate": round(
+            (intents["repaired"] + intents["failed"]) / intents["requests"], 3) if intents["requests"] else 0.0},
+        "errors": len(errors),
+        "error_samples": [f"{name}: {error}" for name, error in errors[:5]],
+        "results": {
+            f"{name}.{key}": summarize(values)
+            for name, timings in results.items() for key, values in timings.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prompt flows against the fake Gemini backend")
+    parser.add_argument("--pods", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=5, help="runs of every flow")
+    parser.add_argument("--sessions", type=int, default=1, help="sessions running at the same time, one process each")
+    parser.add_argument("--latency-ms", type=float, default=400, help="median model latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="share of unconstrained intent answers the fake backend wraps in prose")
+    parser.add_argument("--free-text-intents", dest="structured_output", action="store_false",
+                        help="ask for intent JSON in the prompt instead of the structured-output mode")
+    parser.add_argument("--k8s-latency-ms", type=float, default=5.0)
+    parser.add_argument("--no-fast-path", dest="fast_path", action="store_false",
+                        help="send every prompt to the model instead of the local classifier")
+    parser.add_argument("--no-intent-cache", dest="intent_cache", action="store_false",
+                        help="send repeated prompts to the model again instead of answering them from the cache")
+    parser.add_argument("--only", nargs="*", choices=list(FLOWS))
+    parser.add_argument("--timeout", type=float, default=120, help="seconds a single script run may take")
+    parser.add_argument("--output", help="write the report as JSON to this path")
+    parser.add_argument("--baseline", help="a previous --output report to compare p99 latencies against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p99 growth over the baseline")
+    args = parser.parse_args()
+
+    report = run(args)
+    print(f"{'flow':28} {'p50 ms':>10} {'p99 ms':>10}")
+    for name, result in report["results"].items():
+        print(f"{name:28} {result['p50_ms']:>10} {result['p99_ms']:>10}")
+    print(f"throughput: {report['throughput_flows_per_s']} flows/s, errors: {report['errors']}")
+    print(f"intents: {report['intents']}")
+    for sample in report["error_samples"]:
+        print(f"  {sample}", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: p99 {before} ms -> {after} ms")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
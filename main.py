@@ -1,38 +1,49 @@
 import streamlit as st
-import tempfile
+import time
 import pandas as pd
-import json
+from collections import deque
 from dotenv import load_dotenv
-from google import genai
-from kubernetes import client, config
+from kubernetes import config
 from kubernetes.client import ApiException
+from app.services import batch, clients, intent_classifier, multi_cluster, pod_index, singleflight
+from app.services.gemini_calls import GEMINI_ERRORS, TimedStream, call_stats, calls, error_message, export_json, record_cache_hit
+from app.services.gemini_scheduler import SchedulerBusy, get_scheduler
+from app.services.health_store import HEALTH_NAMESPACES, get_health_store, start_sampler
+from app.services.intent_cache import get_intent_cache
+from app.services.intent_schema import intent_schema, request_intent, stats as intent_stats
+from app.services.log_analysis import condense_logs
+from app.services.log_frame import aggregate, parse_json_logs, summarize_for_gemini
+from app.services.log_service import LOG_BUFFER_LINES, fetch_logs, get_log_stream
+from app.services.log_templates import mine_templates
+from app.services.pod_describer import DESCRIBE_PROFILE, PROFILES, describe_pod_structured, profile_token_counts
+from app.services.scaling import scale_deployments, scale_items
+from app.utils.tokens import estimate_tokens
+from app.utils.tracing import span
+
+rerun_started = time.perf_counter()
 
 # from .env (DONT PUSH TO GITHUB)
 load_dotenv()
 API_KEY = st.secrets.get("API_KEY") # os.getenv("API_KEY")
 
-if not API_KEY:
+if not API_KEY and clients.MODEL_BACKEND != "fake":
     st.error("API key not found...")
     st.stop()
 
 kubeconfig_content = st.secrets.get("KUBECONFIG")
 
-with tempfile.NamedTemporaryFile(delete=False) as tmp:
-    tmp.write(kubeconfig_content.encode())
-    tmp_path = tmp.name
-
 # more from py client for k8s
 # https://github.com/kubernetes-client/python
+# clients are cached resources, so reruns reuse them instead of reloading the kubeconfig
 try:
-    config.load_kube_config(config_file=tmp_path)
-    v1 = client.CoreV1Api()
-    apps_v1 = client.AppsV1Api()
+    v1, apps_v1 = clients.kube_clients(kubeconfig_content)
 except config.config_exception.ConfigException as e:
     st.error(f"Kubernetes configuration error: {e}")
     st.stop()
 
 # Gemini client setup
-gclient = genai.Client(api_key=API_KEY)
+gclient = clients.gemini_client(API_KEY)
+init_ms = (time.perf_counter() - rerun_started) * 1000
 
 podnames = [
     "recommendationservice", "emailservice", "productcatalogservice",
@@ -40,6 +51,7 @@ podnames = [
     "cartservice", "currencyservice", "paymentservice",
     "checkoutservice"
 ]
+INTENT_ACTIONS = ["logs", "scale", "status", "description", "irrelevant", "help"]
 
 
 def initialize_session_state():
@@ -55,27 +67,71 @@ def initialize_session_state():
         st.session_state.description = None
     if 'prompt' not in st.session_state:
         st.session_state.prompt = None
+    if 'rollouts' not in st.session_state:
+        st.session_state.rollouts = None
+    if 'targets' not in st.session_state:
+        st.session_state.targets = None
+    if 'target' not in st.session_state:
+        st.session_state.target = None
+    if 'describe_profile' not in st.session_state:
+        st.session_state.describe_profile = DESCRIBE_PROFILE
+    if 'live_logs' not in st.session_state:
+        st.session_state.live_logs = None
+    if 'log_cursors' not in st.session_state:
+        st.session_state.log_cursors = {}
+    if 'batch' not in st.session_state:
+        st.session_state.batch = None
 
 
 initialize_session_state()
 
 
-def get_pod_status(pod_name: str, namespace: str):
+def kube_clients_for(context):
+    if context is None:
+        return v1, apps_v1
+    return clients.kube_clients(kubeconfig_content, context)
+
+
+def kube_client_for(context):
+    return kube_clients_for(context)[0]
+
+
+def get_pod_status(pod_name: str, namespace: str, label_selector=None, field_selector=None, context=None):
     try:
-        pods = v1.list_namespaced_pod(namespace)
-        for pod in pods.items:
-            if pod_name in pod.metadata.name:
-                return {
-                    "Pod": pod.metadata.name,
-                    "Status": pod.status.phase,
-                    "Node": pod.spec.node_name,
-                    "Restarts": sum([c.restart_count for c in pod.status.container_statuses or []]),
-                }
+        for pod in pod_index.find_pods(kube_client_for(context), pod_name, namespace, label_selector, field_selector):
+            return {
+                "Pod": pod.metadata.name,
+                "Status": pod.status.phase,
+                "Node": pod.spec.node_name,
+                "Restarts": sum([c.restart_count for c in pod.status.container_statuses or []]),
+            }
         return {"Pod": pod_name, "Status": "NOT FOUND", "Node": "-", "Restarts": "-"}
     except ApiException as e:
         return {"Pod": pod_name, "Status": f"ERROR: {e.reason}", "Node": "-", "Restarts": "-"}
 
 
+def get_target_statuses(targets, services):
+    return multi_cluster.fetch_target_statuses(targets, services, kube_client_for)
+
+
+def current_target():
+    # (context, namespace) the logs, description and scale views act on
+    return multi_cluster.intent_target(st.session_state.target, st.session_state.response_json)
+
+
+def sample_health():
+    return [
+        (multi_cluster.target_label((None, namespace)), pod_index.get_statuses(v1, podnames, namespace)[0])
+        for namespace in HEALTH_NAMESPACES
+    ]
+
+
+start_sampler(sample_health)
+
+
+usage_columns = {"CPU trend": st.column_config.LineChartColumn("CPU trend (m)")}
+
+
 def color_status(val):
     if val == "Running":
         return "color: green;"
@@ -86,29 +142,13 @@ def color_status(val):
     return ""
 
 
-def describe_pod(pod_name: str, namespace="default"):
+def describe_pod(pod_name: str, namespace="default", profile=DESCRIBE_PROFILE, label_selector=None, field_selector=None,
+                 context=None):
     try:
-        pods = v1.list_namespaced_pod(namespace)
-
-        for pod in pods.items:
-            if pod_name in pod.metadata.name:
-                return f"""
-                
-                === Metadata ===
-                
-                Pod Name: {pod.metadata.name}
-                Namespace: {pod.metadata.namespace}
-                Node: {pod.spec.node_name}
-                Labels: {pod.metadata.labels}
-                Annotations: {pod.metadata.annotations}
-                
-                === Status ===
-                
-                Host IP: {pod.status.host_ip}
-                Pod IP: {pod.status.pod_ip}
-                Container: {pod.status.container_statuses}
-                """
-
+        pod_v1 = kube_client_for(context)
+        pods = pod_index.find_pods(pod_v1, pod_name, namespace, label_selector, field_selector)
+        if pods:
+            return describe_pod_structured(pod_v1, pods[0], profile)
         return f"No pod found for {pod_name}"
     except ApiException as e:
         return f"API ERROR:{e}"
@@ -124,61 +164,58 @@ Given below is part of the description for a {service} pod running on my GKE clu
 Based on the above description answer the prompt given (by another person) below. If not possible suggest ways and commands on how to resolve any issues in the prompt if it makes sense
 
 {prompt}
+
+Recent health history of {service}:
+{get_health_store().trend_summary(service=service)}
 """
-    response = gclient.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=desc_prompt
-    )
-    return response.text
+    return TimedStream(gclient, "gemini-2.5-flash", desc_prompt, "pod_description")
 
-def get_logs(service: str, namespace="default", tail_lines=100):
+def get_logs(service: str, namespace="default", tail_lines=100, label_selector=None, field_selector=None, context=None):
     try:
-        pods = v1.list_namespaced_pod(namespace)
-        for pod in pods.items:
-            if service in pod.metadata.name:
-                return v1.read_namespaced_pod_log(
-                    name=pod.metadata.name,
-                    namespace=namespace,
-                    tail_lines=tail_lines
-                )
-        return f"No pod found for {service}"
+        pod_v1 = kube_client_for(context)
+        pods = pod_index.find_pods(pod_v1, service, namespace, label_selector, field_selector)
+        if not pods:
+            return f"No pod found for {service}"
+        return fetch_logs(pod_v1, pods, namespace, tail_lines)
     except ApiException as e:
         return f"Error fetching logs for {service}: {e.reason}"
 
 
-def scale_deployment(service: str, replicas: int, namespace="default"):
-    try:
-        body = {"spec": {"replicas": replicas}}
-        apps_v1.patch_namespaced_deployment_scale(
-            name=service, namespace=namespace, body=body
-        )
-        return f"Scaled {service} to {replicas} replicas."
-    except ApiException as e:
-        return f"Error scaling {service}: {e.reason}"
+def follow_logs(service: str, namespace="default", context=None):
+    pod_v1 = kube_client_for(context)
+    return [get_log_stream(pod_v1, pod.metadata.name, namespace) for pod in pod_index.find_pods(pod_v1, service, namespace)]
+
 
 def get_gemini_intent(prompt: str):
+    cache = get_intent_cache()
+    cache_key = cache.key(prompt, podnames, "gemini-2.5-flash", INTENT_ACTIONS)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        record_cache_hit("intent", "gemini-2.5-flash")
+        return cached
+
     modified_prompt = f"""
     Convert this user request into JSON with fields:
-    - action: one of [logs, scale, description, irrelevant, help]
+    - action: one of [{', '.join(INTENT_ACTIONS)}]
     - service: the pod/deployment name, one of {podnames}
     - namespace: default unless specified
     - replicas: integer if scaling, else null
+    - scales: if several deployments are scaled, a list of objects with service and replicas, else null
 
     Request: {prompt}
     Respond with only valid JSON and nothing else. Do not use markdown backticks.
     """
-    response = gclient.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=modified_prompt
-    )
-    try:
-        return json.loads(response.text.strip())
-    except (json.JSONDecodeError, AttributeError) as e:
-        st.error(f"Could not parse Gemini response: {response.text}")
+    schema = intent_schema(INTENT_ACTIONS, podnames)
+    intent, text = request_intent(gclient, "gemini-2.5-flash", modified_prompt, schema)
+    if intent is None:
+        st.error(f"Could not parse Gemini response: {text}")
         return None
+    cache.put(cache_key, intent)
+    return intent
 
 
 def analyze_logs_with_gemini(logs: str, service: str, prompt: str):
+    logs = condense_logs(gclient, logs, service, prompt)
     modified_followup_prompt = f"""
     Given below are the logs for the {service} of my application.
 
@@ -189,12 +226,11 @@ def analyze_logs_with_gemini(logs: str, service: str, prompt: str):
     User prompt: {prompt}
 
     For context, other services running are: {', '.join(podnames)}.
+
+    Recent health history of the services:
+    {get_health_store().trend_summary()}
     """
-    response = gclient.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=modified_followup_prompt
-    )
-    return response.text
+    return TimedStream(gclient, "gemini-2.5-flash", modified_followup_prompt, "analyze_logs")
 
 def go_to_main():
     st.session_state.current_view = 'main'
@@ -203,20 +239,67 @@ def go_to_main():
     st.session_state.description = None
     st.session_state.response_json = None
     st.session_state.prompt = None
+    st.session_state.live_logs = None
+    st.session_state.log_cursors = {}
+    st.session_state.rollouts = None
+    st.session_state.batch = None
+    st.rerun()
+
+
+def show_gemini_error(error):
+    # a full queue clears up on its own, a failed request is worth a look
+    if isinstance(error, SchedulerBusy):
+        st.warning(error_message(error))
+    else:
+        st.error(error_message(error))
+
+
+def get_gemini_intents(prompts):
+    schema = intent_schema(INTENT_ACTIONS, podnames)
+    return batch.classify(gclient, "gemini-2.5-flash", prompts, schema, INTENT_ACTIONS, podnames)
+
+
+def process_batch(text: str):
+    prompts = batch.parse_prompts(text)
+    if not prompts:
+        st.warning("No prompts found, put one prompt per line.")
+        return
+    # scaling changes the cluster, so a batch only reads
+    profile = st.session_state.describe_profile
+    target = st.session_state.target
+    where = lambda i: dict(zip(("context", "namespace"), multi_cluster.intent_target(target, i)))
+    handlers = {
+        "status": lambda i: batch.status_text(get_pod_status(i["service"], **where(i))),
+        "logs": lambda i: get_logs(i["service"], **where(i)),
+        "description": lambda i: describe_pod(i["service"], profile=profile, **where(i)),
+    }
+    with st.spinner(f"Running {len(prompts)} prompts..."):
+        try:
+            intents = get_gemini_intents(prompts)
+        except GEMINI_ERRORS as e:
+            show_gemini_error(e)
+            return
+        st.session_state.batch = batch.run(prompts, intents, handlers)
+    st.session_state.current_view = 'batch_view'
     st.rerun()
 
 
 def process_main_prompt(prompt):
     with st.spinner("Analyzing prompt with Gemini..."):
-        intent = get_gemini_intent(prompt)
+        try:
+            intent = intent_classifier.fast_intent(prompt, podnames) or get_gemini_intent(prompt)
+        except GEMINI_ERRORS as e:
+            show_gemini_error(e)
+            return
         if intent:
             st.session_state.response_json = intent
             action = intent.get("action")
             service = intent.get("service")
+            context, namespace = current_target()
 
             if action == "logs":
                 st.session_state.service = service
-                st.session_state.logs = get_logs(service, intent.get("namespace", "default"))
+                st.session_state.logs = get_logs(service, namespace, context=context)
                 st.session_state.current_view = 'logs_view'
             elif action == "scale":
                 st.session_state.current_view = 'scale_view'
@@ -227,7 +310,9 @@ def process_main_prompt(prompt):
             elif action == "description":
                 st.session_state.prompt = prompt
                 st.session_state.service = service
-                st.session_state.description = describe_pod(service, intent.get("namespace", "default"))
+                st.session_state.description = describe_pod(
+                    service, namespace, st.session_state.describe_profile, context=context
+                )
                 st.session_state.current_view = 'description_view'
             elif action == "help":
                 st.session_state.current_view = 'help_view'
@@ -237,11 +322,36 @@ def process_main_prompt(prompt):
         st.rerun()
 
 
+def select_targets():
+    contexts, current = clients.kube_contexts(kubeconfig_content)
+    with st.expander("Clusters and namespaces"):
+        chosen = st.multiselect("Contexts", contexts, default=[current] if current else [])
+        namespaces = st.text_input("Namespaces (comma separated)", "default")
+        namespaces = [n.strip() for n in namespaces.split(",") if n.strip()] or ["default"]
+        # the current context uses the default clients
+        targets = [(None if c == current else c, n) for c in chosen or [current] for n in namespaces]
+        # logs, descriptions and scaling act on one of them
+        if len(targets) > 1:
+            st.session_state.target = st.selectbox("Logs, descriptions and scaling use",
+                                                   targets, format_func=multi_cluster.target_label)
+        else:
+            st.session_state.target = targets[0]
+    return targets
+
+
 def display_main_view():
     st.title("Gemini Cluster Assistant for Kubernetes")
-    pod_data = [get_pod_status(name, "default") for name in podnames]
+    st.session_state.targets = select_targets()
+    pod_data, timings = get_target_statuses(st.session_state.targets, podnames)
     df = pd.DataFrame(pod_data)
-    st.dataframe(df.style.map(color_status, subset=["Status"]))
+    if len(st.session_state.targets) == 1:
+        df = df.drop(columns=["Context", "Namespace"])
+    st.dataframe(df.style.map(color_status, subset=["Status"]), column_config=usage_columns)
+    st.caption(pod_index.format_timings(timings))
+
+    with st.expander("Health history"):
+        hours = st.selectbox("Window (hours)", [1, 6, 24, 72])
+        st.dataframe(get_health_store().deltas(hours * 3600))
 
     with st.form("main_form"):
         prompt = st.text_area("Enter a prompt...", height=120)
@@ -250,41 +360,130 @@ def display_main_view():
     if submitted and prompt.strip():
         process_main_prompt(prompt)
 
+    with st.expander("Batch prompts"):
+        with st.form("batch_form"):
+            uploaded = st.file_uploader("Prompt file, one prompt per line", type=["txt", "md"])
+            text = st.text_area("...or one prompt per line", height=160)
+            run_batch = st.form_submit_button("Run batch")
+        if run_batch:
+            process_batch(uploaded.getvalue().decode() if uploaded else text)
+
 
 def display_logs_view():
     st.title(f"Logs for {st.session_state.service}")
     st.button("Back to Home (main Gemini Prompt)", on_click=go_to_main)
-    st.text_area(f"Logs for {st.session_state.service}", st.session_state.logs, height=200)
+    st.caption(f"Target: {multi_cluster.target_label(current_target())}")
+
+    if st.toggle("Follow logs", key="follow_logs"):
+        display_live_logs()
+    else:
+        st.text_area(f"Logs for {st.session_state.service}", st.session_state.logs, height=200)
+
+    frame, total_lines = parse_json_logs(st.session_state.logs or "")
+    if not frame.empty:
+        aggregates = aggregate(frame)
+        with st.expander(f"Structured log summary ({len(frame)} of {total_lines} lines are JSON)"):
+            st.dataframe(aggregates["severity"])
+            st.line_chart(aggregates["per_minute"][["lines", "errors"]])
+            st.dataframe(aggregates["top_messages"])
+            if not aggregates["top_errors"].empty:
+                st.dataframe(aggregates["top_errors"])
+
+    templates = mine_templates(st.session_state.logs or "")
+    templates_text = templates.to_text()
+    if templates.templates:
+        with st.expander(f"Log templates ({len(templates.templates)} templates for {templates.lines} lines)"):
+            st.caption(f"Compression ratio: {templates.compression_ratio(templates_text):.1f}x")
+            st.dataframe(templates.rows())
+
+    contexts = {}
+    if not frame.empty:
+        contexts["JSON aggregates and a sample"] = lambda: summarize_for_gemini(frame, total_lines)
+    if templates.templates:
+        contexts["Log templates"] = lambda: templates_text
+    contexts["Raw logs"] = lambda: st.session_state.logs
 
     with st.form("followup_form"):
         followup_prompt = st.text_area("Ask a question about the logs...", height=120)
+        context = st.radio("Send to Gemini", list(contexts), horizontal=True)
         followup_submitted = st.form_submit_button("Analyze with Gemini")
 
     if followup_submitted and followup_prompt.strip():
-        with st.spinner("Analyzing..."):
-            response = analyze_logs_with_gemini(
-                st.session_state.logs, st.session_state.service, followup_prompt
-            )
+        logs = contexts[context]()
+        try:
+            with st.spinner("Analyzing..."):
+                response = analyze_logs_with_gemini(logs, st.session_state.service, followup_prompt)
             st.subheader("Gemini's Answer:")
-            st.markdown(response)
+            st.write_stream(response)
+        except GEMINI_ERRORS as e:
+            show_gemini_error(e)
+            return
+        st.caption(response.summary())
+
+
+# only this fragment reruns while following, and it only pulls the lines each
+# pod stream received since the last tick
+@st.fragment(run_every=2)
+def display_live_logs():
+    context, namespace = current_target()
+    if st.session_state.live_logs is None:
+        st.session_state.live_logs = deque(maxlen=LOG_BUFFER_LINES)
+
+    streams = follow_logs(st.session_state.service, namespace, context)
+    for stream in streams:
+        lines, st.session_state.log_cursors[stream.pod] = stream.lines_since(
+            st.session_state.log_cursors.get(stream.pod, 0)
+        )
+        if len(streams) > 1:
+            lines = [f"[{stream.pod}] {line}" for line in lines]
+        st.session_state.live_logs.extend(lines)
+        if stream.error:
+            st.warning(f"{stream.pod}: {stream.error}")
+
+    st.session_state.logs = "\n".join(st.session_state.live_logs)
+    st.text_area(f"Logs for {st.session_state.service} (live)", st.session_state.logs, height=300)
 
 
 def display_scale_view():
     st.title("Scaling Deployment")
     st.button("Back to Main", on_click=go_to_main)
     intent = st.session_state.response_json
-    service = intent.get("service")
-    replicas = intent.get("replicas")
-    namespace = intent.get("namespace", "default")
-
-    if service and replicas is not None:
-        msg = scale_deployment(service, replicas, namespace)
-        st.success(msg)
+    context, namespace = current_target()
+    items = scale_items(intent)
+    st.caption(f"Target: {multi_cluster.target_label((context, namespace))}")
+
+    if items:
+        # patched once per prompt, reruns only poll the rollouts
+        if st.session_state.rollouts is None:
+            st.session_state.rollouts = scale_deployments(kube_clients_for(context)[1], items, namespace)
+        if all(rollout.done for rollout in st.session_state.rollouts):
+            display_rollouts()
+        else:
+            follow_rollouts()
     else:
         st.warning("Could not determine service or replicas from the intent.")
     st.json(intent)
 
 
+def display_rollouts():
+    for rollout in st.session_state.rollouts:
+        progress = min(rollout.ready / rollout.replicas, 1.0) if rollout.replicas else float(rollout.done)
+        st.progress(progress, text=f"{rollout.service}: {rollout.ready}/{rollout.replicas} ready "
+                                   f"({rollout.state}, {rollout.elapsed:.0f}s)")
+        if rollout.state == "ready":
+            st.success(rollout.message)
+        elif rollout.done:
+            st.error(rollout.message)
+
+
+@st.fragment(run_every=1)
+def follow_rollouts():
+    display_rollouts()
+    # one last full rerun, after it the finished rollouts render without the timer
+    if all(rollout.done for rollout in st.session_state.rollouts):
+        st.rerun()
+
+
 def display_status_view():
     st.title("Service Status")
     st.button("Back to Main", on_click=go_to_main)
@@ -293,8 +492,12 @@ def display_status_view():
     namespace = intent.get("namespace", "default")
 
     if service:
-        status = get_pod_status(service, namespace)
-        st.json(status)
+        targets = st.session_state.targets or [(None, namespace)]
+        if namespace != "default":
+            targets = list(dict.fromkeys((context, namespace) for context, _ in targets))
+        rows, timings = get_target_statuses(targets, [service])
+        st.dataframe(pd.DataFrame(rows).style.map(color_status, subset=["Status"]), column_config=usage_columns)
+        st.caption(pod_index.format_timings(timings))
     else:
         st.warning("Could not determine service from the intent.")
     st.json(intent)
@@ -305,19 +508,62 @@ def display_irrelevant_view():
     st.button("Back to Home (main Gemini Prompt)", on_click=go_to_main)
 
 
+def redescribe_pod():
+    context, namespace = current_target()
+    st.session_state.description = describe_pod(
+        st.session_state.service, namespace, st.session_state.describe_profile, context=context
+    )
+
+
+# a fragment, so counting does not rerun the Gemini answer of the view
+@st.fragment
+def display_token_counts():
+    if not st.button("Count tokens"):
+        return
+    context, namespace = current_target()
+    pod_v1 = kube_client_for(context)
+    pods = pod_index.find_pods(pod_v1, st.session_state.service, namespace)
+    if pods:
+        try:
+            st.json(profile_token_counts(gclient, "gemini-2.5-flash", pod_v1, pods[0]))
+        except GEMINI_ERRORS as e:
+            show_gemini_error(e)
+
+
 def display_description_view():
     st.title(f"Describing {st.session_state.service} Pod")
     st.button("Back to Home (main Gemini Prompt)", on_click=go_to_main)
+    st.caption(f"Target: {multi_cluster.target_label(current_target())}")
+
+    st.selectbox("Description detail", list(PROFILES), key="describe_profile", on_change=redescribe_pod)
+    st.caption(f"Description sent to Gemini: ~{estimate_tokens(st.session_state.description or '')} tokens")
+    with st.expander("Tokens per profile"):
+        display_token_counts()
 
     # debug only
     # st.text_area(f"Logs for {st.session_state.service}", st.session_state.description, height=200)
 
-    with st.spinner("Reviewing the Pod Description..."):
-        response = pod_description_with_gemini(
-            st.session_state.description, st.session_state.service, st.session_state.prompt
-        )
-        st.subheader("Gemini's Answer:")
-        st.markdown(response)
+    response = pod_description_with_gemini(
+        st.session_state.description, st.session_state.service, st.session_state.prompt
+    )
+    st.subheader("Gemini's Answer:")
+    try:
+        st.write_stream(response)
+    except GEMINI_ERRORS as e:
+        show_gemini_error(e)
+        return
+    st.caption(response.summary())
+
+def display_batch_view():
+    st.title("Batch report")
+    st.button("Back to Home (main Gemini Prompt)", on_click=go_to_main)
+    rows = st.session_state.batch
+    st.caption(", ".join(f"{count} {status}" for status, count in batch.summary(rows).items()))
+    st.dataframe(pd.DataFrame(rows).drop(columns=["result"]), hide_index=True)
+    for row in rows:
+        with st.expander(f"{row['#']}. {row['prompt']} ({row['status']})"):
+            st.code(row["result"], language=None)
+    st.download_button("Download report (Markdown)", batch.report_markdown(rows), "batch_report.md", "text/markdown")
 
 def display_help_view():
     st.title("Help for this Application")
@@ -346,19 +592,55 @@ This Gemini Cluster Assistant can help you in the following areas.
                 
 - You can scale up or down the replicas in a deployment.
 
+### Batch Prompts
+
+- Run a list of prompts at once from a file or the batch text area, one prompt per line
+- Status, logs and descriptions are collected side by side into one downloadable report
+- Scaling is not run from a batch
+
 """)
 
-if st.session_state.current_view == 'main':
-    display_main_view()
-elif st.session_state.current_view == 'logs_view':
-    display_logs_view()
-elif st.session_state.current_view == 'scale_view':
-    display_scale_view()
-elif st.session_state.current_view == 'status_view':
-    display_status_view()
-elif st.session_state.current_view == 'irrelevant_view':
-    display_irrelevant_view()
-elif st.session_state.current_view == 'description_view':
-    display_description_view()
-elif st.session_state.current_view == 'help_view':
-    display_help_view()
+def display_diagnostics():
+    with st.sidebar.expander("Diagnostics"):
+        st.caption("Intent cache")
+        st.json(get_intent_cache().stats())
+        st.caption("Local intent classifier")
+        st.json(intent_classifier.stats())
+        st.caption("Gemini calls")
+        st.dataframe(call_stats())
+        with st.popover("Recent calls"):
+            st.dataframe(calls())
+        st.download_button("Export Gemini calls (JSON)", export_json(), "gemini_calls.json", "application/json")
+        st.caption("Intent parsing")
+        st.json(intent_stats())
+        st.caption("Gemini scheduler")
+        st.json(get_scheduler().stats())
+        st.caption("Coalesced Kubernetes reads")
+        st.json(singleflight.stats())
+        st.caption("Startup")
+        st.json(clients.init_timings)
+        return st.empty()
+
+
+rerun_timing = display_diagnostics()
+
+
+with span(f"view.{st.session_state.current_view}"):
+    if st.session_state.current_view == 'main':
+        display_main_view()
+    elif st.session_state.current_view == 'logs_view':
+        display_logs_view()
+    elif st.session_state.current_view == 'scale_view':
+        display_scale_view()
+    elif st.session_state.current_view == 'status_view':
+        display_status_view()
+    elif st.session_state.current_view == 'irrelevant_view':
+        display_irrelevant_view()
+    elif st.session_state.current_view == 'description_view':
+        display_description_view()
+    elif st.session_state.current_view == 'help_view':
+        display_help_view()
+    elif st.session_state.current_view == 'batch_view':
+        display_batch_view()
+
+rerun_timing.caption(f"Last rerun: init {init_ms:.1f} ms, total {(time.perf_counter() - rerun_started) * 1000:.1f} ms")
@@ -0,0 +1,65 @@
+import threading
+import time
+import pytest
+from app.services.gemini_scheduler import ANALYSIS, INTERACTIVE, Scheduler, SchedulerBusy, priority_of
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def start(scheduler, priority, admitted, errors):
+    def run():
+        try:
+            scheduler.acquire(priority, 10)
+            admitted.append(priority)
+        except SchedulerBusy as e:
+            errors.append(e)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_interactive_requests_go_ahead_of_analysis():
+    # 10 requests a second, the bucket owes 5, so nothing is admitted for ~0.6 s
+    scheduler = Scheduler(rpm=600, tpm=1000000, max_queue=10, timeout=5)
+    scheduler.requests.level = -5
+    admitted, errors = [], []
+    threads = [start(scheduler, ANALYSIS, admitted, errors)]
+    wait_for(lambda: scheduler.stats()["queue_depth"] == 1)
+    threads.append(start(scheduler, INTERACTIVE, admitted, errors))
+    wait_for(lambda: scheduler.stats()["queue_depth"] == 2)
+    for thread in threads:
+        thread.join()
+    assert admitted == [INTERACTIVE, ANALYSIS]
+    assert not errors
+
+
+def test_full_queue_raises_scheduler_busy():
+    scheduler = Scheduler(rpm=60, tpm=1000000, max_queue=1, timeout=0.5)
+    scheduler.requests.level = -100
+    admitted, errors = [], []
+    thread = start(scheduler, ANALYSIS, admitted, errors)
+    wait_for(lambda: scheduler.stats()["queue_depth"] == 1)
+    with pytest.raises(SchedulerBusy):
+        scheduler.acquire(INTERACTIVE, 10)
+    thread.join()
+    assert scheduler.rejected == 1
+
+
+def test_queue_timeout_raises_scheduler_busy():
+    scheduler = Scheduler(rpm=60, tpm=1000000, max_queue=10, timeout=0.2)
+    scheduler.requests.level = -100
+    start_time = time.monotonic()
+    with pytest.raises(SchedulerBusy):
+        scheduler.acquire(INTERACTIVE, 10)
+    assert 0.2 <= time.monotonic() - start_time < 2
+    assert (scheduler.timed_out, scheduler.stats()["queue_depth"]) == (1, 0)
+
+
+def test_batch_intents_are_interactive():
+    assert priority_of("intent_batch") == priority_of("intent") == INTERACTIVE
+    assert priority_of("analyze_logs") == ANALYSIS
@@ -0,0 +1,52 @@
+import pytest
+from app.services.intent_classifier import classify
+
+PODNAMES = ["frontend", "cartservice", "adservice", "checkoutservice", "paymentservice"]
+
+
+# prompts the local classifier must leave to Gemini, mostly because reading them
+# as an absolute scale would patch the cluster with the wrong replica count
+@pytest.mark.parametrize("prompt", [
+    "scale frontend up by 2",
+    "scale down cartservice by 1",
+    "increase frontend replicas by 2",
+    "reduce cartservice replicas to 1 less",
+    "add 2 replicas to frontend",
+    "remove 1 replica from adservice",
+    "scale frontend to double",
+    "scale everything except frontend to 2",
+    "scale all but cartservice to 3",
+    "scale every service other than frontend to 2",
+    "scale everything excluding adservice to 0",
+    "don't scale frontend to 3",
+    "scale frontend to 3 replicas and then to 5",
+    "show logs and status of frontend",
+])
+def test_falls_back_to_gemini(prompt):
+    assert classify(prompt, PODNAMES) == (None, 0.0)
+
+
+@pytest.mark.parametrize("prompt, scales", [
+    ("scale frontend to 5", [("frontend", 5)]),
+    ("scale frontend to 5 replicas", [("frontend", 5)]),
+    ("set replicas of cartservice to 0", [("cartservice", 0)]),
+    ("scale frontend to 5 and cartservice to 3", [("frontend", 5), ("cartservice", 3)]),
+    ("scale checkout service to 2", [("checkoutservice", 2)]),
+])
+def test_absolute_scales(prompt, scales):
+    intent, confidence = classify(prompt, PODNAMES)
+    assert [(s["service"], s["replicas"]) for s in intent["scales"]] == scales
+    assert (intent["service"], intent["replicas"]) == scales[0]
+    assert confidence >= 0.85
+
+
+@pytest.mark.parametrize("prompt, action, service", [
+    ("show me the logs of frontend", "logs", "frontend"),
+    ("describe the paymentservice pod", "description", "paymentservice"),
+    ("what is the status of cartservice", "status", "cartservice"),
+    ("help", "help", None),
+])
+def test_simple_commands(prompt, action, service):
+    intent, confidence = classify(prompt, PODNAMES)
+    assert (intent["action"], intent["service"]) == (action, service)
+    assert confidence >= 0.85
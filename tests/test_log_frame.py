@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+from app.services.log_frame import parse_json_logs
+
+
+@pytest.mark.parametrize("line, pod, timestamp", [
+    ('2026-01-01T10:00:00.5Z [frontend-1] {"severity": "info", "message": "hi"}', "frontend-1", "2026-01-01T10:00:00.5Z"),
+    ('[frontend-1] {"severity": "info", "message": "hi", "timestamp": 1767261600}', "frontend-1", "2026-01-01T10:00:00Z"),
+    ('2026-01-01T10:00:00Z {"message": "hi"}', None, "2026-01-01T10:00:00Z"),
+    ('{"message": "hi", "timestamp": "2026-01-01T10:00:00.123456789Z"}', None, "2026-01-01T10:00:00.123456789Z"),
+    ('[cartservice-2] {"message": "hi", "timestamp": "2026-01-01T11:00:00+01:00"}', "cartservice-2", "2026-01-01T10:00:00Z"),
+])
+def test_parses_tagged_and_timestamped_lines(line, pod, timestamp):
+    frame, total = parse_json_logs(line)
+    assert (len(frame), total) == (1, 1)
+    assert frame["pod"][0] == pod
+    assert frame["timestamp"][0] == pd.Timestamp(timestamp)
+
+
+def test_logged_timestamp_wins_over_the_kubelet_one():
+    frame, _ = parse_json_logs('2026-01-01T10:00:05Z [a] {"message": "hi", "timestamp": "2026-01-01T10:00:00Z"}\n'
+                               'not json')
+    assert frame["timestamp"].tolist() == [pd.Timestamp("2026-01-01T10:00:00Z")]
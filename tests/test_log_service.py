@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+from app.services import log_service
+from app.services.log_service import LogStream, merge_logs
+
+
+def test_merge_logs_orders_by_timestamp():
+    merged = merge_logs([
+        ("a", "2026-01-01T00:00:01.5Z one\n2026-01-01T00:00:03Z three"),
+        ("b", "2026-01-01T00:00:01.25Z zero\n2026-01-01T00:00:02Z two"),
+    ])
+    assert [line.split(" ", 2)[2] for line in merged.splitlines()] == ["zero", "one", "two", "three"]
+
+
+def test_reconnect_does_not_repeat_buffered_lines(monkeypatch):
+    # the second connection resumes a second early and repeats the last line
+    connections = [
+        ["2026-01-01T00:00:01.1Z first", "2026-01-01T00:00:02.2Z second"],
+        ["2026-01-01T00:00:02.2Z second", "2026-01-01T00:00:03.3Z third"],
+    ]
+    requests = []
+
+    class StubWatch:
+        def stream(self, fn, **kwargs):
+            requests.append(kwargs)
+            yield from connections[len(requests) - 1]
+            if len(requests) == len(connections):
+                stream.stop()
+
+        def stop(self):
+            pass
+
+    monkeypatch.setattr(log_service.watch, "Watch", StubWatch)
+    stream = LogStream(SimpleNamespace(read_namespaced_pod_log=None), "frontend-1")
+    stream._follow()
+    assert stream.lines() == ["first", "second", "third"]
+    assert all(r["timestamps"] for r in requests)
+    assert "since_seconds" in requests[1]
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+from urllib3.exceptions import ReadTimeoutError
+from app.services import metrics_service
+from app.services.metrics_service import MetricsStore, add_usage
+
+
+class StubMetricsApi:
+    def __init__(self):
+        self.pods = {}
+        self.error = None
+
+    def list_namespaced_custom_object(self, group, version, namespace, plural, **kwargs):
+        if self.error:
+            raise self.error
+        return {"items": [{"metadata": {"name": name}, "timestamp": f"2026-01-01T00:00:{second:02d}Z",
+                           "containers": [{"name": "server", "usage": {"cpu": "100m", "memory": "64Mi"}}]}
+                          for name, second in self.pods.items()]}
+
+    def list_cluster_custom_object(self, group, version, plural, **kwargs):
+        return {"items": []}
+
+
+def setup(monkeypatch):
+    api = StubMetricsApi()
+    monkeypatch.setattr(metrics_service, "metrics_api_for", lambda v1: api)
+    return api, SimpleNamespace(api_client=object()), MetricsStore(interval=0)
+
+
+def row(pod):
+    return {"Service": pod, "Pod": pod, "Status": "Running", "Node": "-", "Restarts": 0}
+
+
+def test_series_of_deleted_pods_are_dropped(monkeypatch):
+    api, v1, store = setup(monkeypatch)
+    api.pods = {"frontend-a": 1, "frontend-b": 1}
+    store.refresh(v1).result()
+    api.pods = {"frontend-b": 2, "frontend-c": 2}
+    store.refresh(v1).result()
+    assert store.series(v1, "default", "frontend-a") is None
+    assert store.series(v1, "default", "frontend-b").count == 2
+    assert store.series(v1, "default", "frontend-c").count == 1
+
+
+def test_failed_metrics_read_keeps_the_last_samples(monkeypatch):
+    api, v1, store = setup(monkeypatch)
+    api.pods = {"frontend-a": 1}
+    store.refresh(v1).result()
+    api.error = ReadTimeoutError(None, "/apis/metrics.k8s.io", "Read timed out.")
+    rows = [row("frontend-a")]
+    add_usage(rows, v1, store=store)
+    assert rows[0]["Status"] == "Running"
+    assert (rows[0]["CPU (m)"], rows[0]["Memory (Mi)"]) == (100, 64)
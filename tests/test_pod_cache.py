@@ -0,0 +1,19 @@
+from types import SimpleNamespace
+import pytest
+from app.services.pod_cache import pod_keys
+
+
+def pod(name, app=None, replica_set=None):
+    owners = [SimpleNamespace(kind="ReplicaSet", name=replica_set)] if replica_set else None
+    return SimpleNamespace(metadata=SimpleNamespace(name=name, labels={"app": app} if app else {},
+                                                    owner_references=owners))
+
+
+@pytest.mark.parametrize("p, keys", [
+    (pod("frontend-7d9f-abcde", app="frontend", replica_set="frontend-7d9f"), {"frontend"}),
+    (pod("frontend-canary-7d9f-abcde", app="frontend-canary", replica_set="frontend-canary-7d9f"), {"frontend-canary"}),
+    (pod("frontend-canary-7d9f-abcde", replica_set="frontend-canary-7d9f"), {"frontend-canary"}),
+    (pod("redis-cart-0"), {"redis", "redis-cart"}),
+])
+def test_pod_keys(p, keys):
+    assert pod_keys(p) == keys
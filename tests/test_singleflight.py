@@ -0,0 +1,59 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.services.singleflight import Group
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_concurrent_callers_share_one_call():
+    group = Group(ttl=0)
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return "pods"
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(group.do, "key", fn) for _ in range(5)]
+        wait_for(lambda: group.shared == 4)
+        release.set()
+        results = [f.result() for f in futures]
+    assert results == ["pods"] * 5
+    assert len(calls) == 1
+
+
+def test_result_is_reused_within_the_ttl():
+    group = Group(ttl=60)
+    calls = []
+    assert group.do("key", lambda: calls.append(1) or len(calls)) == 1
+    assert group.do("key", lambda: calls.append(1) or len(calls)) == 1
+    assert group.do("other", lambda: calls.append(1) or len(calls)) == 2
+    assert (group.calls, group.fresh) == (2, 1)
+
+
+def test_result_expires_after_the_ttl():
+    group = Group(ttl=0.05)
+    group.do("key", lambda: 1)
+    time.sleep(0.1)
+    assert group.do("key", lambda: 2) == 2
+
+
+def test_errors_are_not_cached():
+    group = Group(ttl=60)
+
+    def fail():
+        raise RuntimeError("apiserver unavailable")
+
+    with pytest.raises(RuntimeError):
+        group.do("key", fail)
+    assert group.do("key", lambda: "pods") == "pods"
+    assert group.calls == 2